@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Create many metrics YAML files from a manifest
+
+A manifest lists one client/brand/media type/platform combination per row and
+can be a CSV file, a YAML list or JSON lines. Rows are fanned out over a pool
+of worker processes; each worker compiles the schema validator once and parses
+each template at most once, so the per-row cost is a dict copy and a YAML dump.
+
+Usage:
+    python batch_create.py manifest.csv [--jobs 4] [--output-dir out] [--report report.json]
+"""
+import os
+import csv
+import json
+import time
+import yaml_io
+from concurrent.futures import ProcessPoolExecutor
+
+from generate_metrics_yaml import (
+    create_metrics_yaml_file, generate_all_templates,
+    normalize_platform_and_media_type, default_template_path
+)
+from validation import get_validator, comprehensive_file_validation
+from template_manager import TemplateManager
+
+REQUIRED_FIELDS = ["client", "brand", "media_type", "platform"]
+
+# Per-process state, filled in by _init_worker
+_worker_state = {}
+
+def _normalize_row(row):
+    """Lower-case row keys and accept 'media-type' / 'Media Type' spellings
+
+    Rows that are not mappings are returned as they are and reported as
+    row errors by create_batch.
+    """
+    if not isinstance(row, dict):
+        return row
+    normalized = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        key = str(key).strip().lower().replace("-", "_").replace(" ", "_")
+        if isinstance(value, str):
+            value = value.strip()
+        if value not in (None, ""):
+            normalized[key] = value
+    return normalized
+
+def load_manifest(manifest_path):
+    """Load manifest rows from a CSV, YAML or JSON lines file
+
+    Returns:
+        List of row dicts with normalized keys
+    """
+    extension = os.path.splitext(manifest_path)[1].lower()
+
+    with open(manifest_path, 'r', newline='') as file:
+        if extension == ".csv":
+            rows = list(csv.DictReader(file))
+        elif extension in (".yaml", ".yml"):
+            data = yaml_io.safe_load(file) or []
+            rows = data.get("rows", []) if isinstance(data, dict) else data
+            if not isinstance(rows, list):
+                raise ValueError(f"Manifest must be a list of rows: {manifest_path}")
+        elif extension in (".jsonl", ".ndjson"):
+            rows = [json.loads(line) for line in file if line.strip()]
+        else:
+            raise ValueError(f"Unsupported manifest format: {manifest_path}")
+
+    return [_normalize_row(row) for row in rows]
+
+def resolve_row_template(row, preset_dir):
+    """Return the template path a manifest row will use, or None for the default"""
+    if row.get("preset"):
+        preset_path = os.path.join(preset_dir, f"{row['preset']}.yaml")
+        if not os.path.exists(preset_path):
+            raise ValueError(f"Preset template '{row['preset']}' not found")
+        return preset_path
+    template_path = row.get("template")
+    if template_path and not os.path.exists(template_path):
+        raise ValueError(f"Template '{template_path}' not found")
+    return template_path
+
+def resolve_row_output(row, output_dir):
+    """Return the path a manifest row will be written to"""
+    output_path = row.get("output")
+    if output_path and output_dir and not os.path.isabs(output_path):
+        output_path = os.path.join(output_dir, output_path)
+    elif not output_path:
+        model_name = f"{row['client']} - {row['brand']} - {row['media_type']} - {row['platform']}"
+        output_path = os.path.join(output_dir or os.getcwd(), f"{model_name}_metrics.yaml")
+    return output_path
+
+def _failed_row(index, row, error):
+    """Result for a row rejected before it is dispatched"""
+    row = row if isinstance(row, dict) else {}
+    return {
+        "row": index,
+        **{field: row.get(field) for field in REQUIRED_FIELDS},
+        "output": None,
+        "success": False,
+        "written": False,
+        "errors": [error],
+        "seconds": 0.0
+    }
+
+def _init_worker(validate):
+    """Compile the schema validator once per worker process"""
+    if validate:
+        get_validator()
+    _worker_state["validate"] = validate
+
+def _process_row(index, row, output_path, template_path):
+    """Create (and optionally validate) the metrics file for one manifest row"""
+    start = time.perf_counter()
+    result = {
+        "row": index,
+        "client": row.get("client"),
+        "brand": row.get("brand"),
+        "media_type": row.get("media_type"),
+        "platform": row.get("platform"),
+        "output": None,
+        "success": False,
+        "written": False,
+        "errors": []
+    }
+
+    missing = [field for field in REQUIRED_FIELDS if not row.get(field)]
+    if missing:
+        result["errors"].append(f"Missing required field(s): {', '.join(missing)}")
+        result["seconds"] = time.perf_counter() - start
+        return result
+
+    try:
+        created = create_metrics_yaml_file(
+            client_name=row["client"],
+            brand_name=row["brand"],
+            media_type=row["media_type"],
+            platform=row["platform"],
+            template_path=template_path,
+            output_path=output_path
+        )
+    except Exception as e:
+        created = None
+        result["errors"].append(f"Error creating metrics YAML file: {str(e)}")
+
+    if created:
+        output_path = created["path"]
+        result["output"] = output_path
+        result["written"] = created["written"]
+        result["success"] = True
+        if _worker_state["validate"]:
+            is_valid, errors = comprehensive_file_validation(output_path)
+            result["success"] = is_valid
+            result["errors"].extend(errors)
+    elif not result["errors"]:
+        result["errors"].append("Failed to create metrics YAML file")
+
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def create_batch(manifest_path, jobs=1, output_dir=None, validate=True):
+    """Create a metrics YAML file for every row in a manifest
+
+    Args:
+        manifest_path: Path to a CSV, YAML or JSON lines manifest
+        jobs: Number of worker processes
+        output_dir: Directory for rows without an absolute output path
+        validate: Whether to validate each generated file
+
+    Returns:
+        Summary dict with per-row results in manifest order
+    """
+    start = time.perf_counter()
+    rows = load_manifest(manifest_path)
+
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    # Resolve templates and outputs up front so missing templates are
+    # generated once here rather than concurrently in every worker, and no
+    # two rows write the same file at the same time
+    manager = TemplateManager()
+    tasks = []
+    failed = []
+    outputs = {}
+    missing_templates = False
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            failed.append(_failed_row(index, row, f"Manifest row is not a mapping: {row!r}"))
+            continue
+        try:
+            template_path = resolve_row_template(row, manager.preset_dir)
+        except ValueError as e:
+            failed.append(_failed_row(index, row, str(e)))
+            continue
+
+        # Rows missing required fields are reported by _process_row
+        output_path = None
+        if all(row.get(field) for field in REQUIRED_FIELDS):
+            output_path = resolve_row_output(row, output_dir)
+            key = os.path.abspath(output_path)
+            if key in outputs:
+                failed.append(_failed_row(index, row, f"Output {output_path} is also written by row {outputs[key]}"))
+                continue
+            outputs[key] = index
+
+        if not template_path and row.get("platform") and row.get("media_type"):
+            dsp_key, media_type_key = normalize_platform_and_media_type(row["platform"], row["media_type"])
+            missing_templates = missing_templates or not os.path.exists(default_template_path(dsp_key, media_type_key))
+        tasks.append((index, row, output_path, template_path))
+
+    if missing_templates:
+        print("Templates missing. Generating templates...")
+        generate_all_templates()
+
+    if jobs and jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(validate,)) as executor:
+            futures = [executor.submit(_process_row, *task) for task in tasks]
+            results = [future.result() for future in futures]
+    else:
+        _init_worker(validate)
+        results = [_process_row(*task) for task in tasks]
+
+    results = sorted(results + failed, key=lambda result: result["row"])
+    succeeded = sum(1 for result in results if result["success"])
+    written = sum(1 for result in results if result["written"])
+    created = sum(1 for result in results if result["output"])
+
+    return {
+        "manifest": manifest_path,
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "written": written,
+        "unchanged": created - written,
+        "jobs": max(jobs or 1, 1),
+        "seconds": time.perf_counter() - start,
+        "rows": results
+    }
+
+def write_report(summary, report_path):
+    """Write a batch summary as JSON"""
+    with open(report_path, 'w') as file:
+        json.dump(summary, file, indent=2)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Create metrics YAML files from a manifest')
+    parser.add_argument('manifest', help='CSV, YAML or JSON lines manifest')
+    parser.add_argument('--jobs', type=int, default=1, help='Number of worker processes')
+    parser.add_argument('--output-dir', help='Directory for generated files')
+    parser.add_argument('--report', help='Path for the JSON summary report')
+    parser.add_argument('--no-validate', action='store_true', help='Skip validation of generated files')
+    args = parser.parse_args()
+
+    summary = create_batch(args.manifest, args.jobs, args.output_dir, not args.no_validate)
+    if args.report:
+        write_report(summary, args.report)
+    print(f"Created {summary['succeeded']}/{summary['total']} metrics files in {summary['seconds']:.2f}s "
+          f"({summary['written']} written, {summary['unchanged']} unchanged)")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark the persistent example index
+
+Times a cold index build, a warm refresh with nothing changed, and a warm
+refresh after touching a small fraction of the files.
+
+Usage:
+    python benchmarks/bench_example_index.py [--files 2000] [--touch 0.01]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_metrics_yaml import ExampleIndex
+from bench_example_scan import build_repo
+
+def timed_refresh(index_path, yaml_files):
+    start = time.perf_counter()
+    index = ExampleIndex(index_path)
+    stats = index.refresh(yaml_files)
+    if stats["added"] or stats["changed"] or stats["removed"]:
+        index.save()
+    index.examples()
+    return time.perf_counter() - start, stats
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the persistent example index')
+    parser.add_argument('--files', type=int, default=2000, help='Number of example files')
+    parser.add_argument('--touch', type=float, default=0.01, help='Fraction of files to modify before the last run')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        yaml_files = build_repo(os.path.join(root, "metrics"), args.files)
+        index_path = os.path.join(root, "example_index.json")
+
+        cold_time, cold_stats = timed_refresh(index_path, yaml_files)
+        warm_time, warm_stats = timed_refresh(index_path, yaml_files)
+
+        touched = random.Random(0).sample(yaml_files, max(1, int(len(yaml_files) * args.touch)))
+        for yaml_file in touched:
+            with open(yaml_file, 'a') as file:
+                file.write("# touched\n")
+        touched_time, touched_stats = timed_refresh(index_path, yaml_files)
+
+    print(f"files: {args.files}")
+    print(f"cold build:     {cold_time:8.3f}s  {cold_stats}")
+    print(f"warm refresh:   {warm_time:8.3f}s  {warm_stats}")
+    print(f"after touching: {touched_time:8.3f}s  {touched_stats}")
+
+if __name__ == "__main__":
+    main()
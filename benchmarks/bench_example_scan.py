@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark the example file scan used by find_example_files
+
+Builds synthetic metrics repos of increasing size and compares the original
+DSP x media type scan (each file re-read 16 times) with the single-pass
+index_example_files scan.
+
+Usage:
+    python benchmarks/bench_example_scan.py [--sizes 250,500,1000,2000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_metrics_yaml import DSP_TYPES, MEDIA_TYPES, index_example_files
+
+TEMPLATE_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "templates", "ttd", "display_template.yaml"
+)
+
+def legacy_find_example_files(yaml_files):
+    """The original nested scan, kept here as the baseline"""
+    examples = {}
+    for dsp in DSP_TYPES:
+        examples[dsp] = {}
+        for media_type in MEDIA_TYPES:
+            examples[dsp][media_type] = []
+            for yaml_file in yaml_files:
+                with open(yaml_file, 'r') as file:
+                    file_content = file.read().upper()
+                filename = os.path.basename(yaml_file).upper()
+                if (dsp in filename or dsp in file_content) and (media_type in filename or media_type in file_content):
+                    examples[dsp][media_type].append(yaml_file)
+    return examples
+
+def build_repo(root, count):
+    """Write count synthetic metrics files under root"""
+    with open(TEMPLATE_FILE, 'r') as file:
+        body = "".join(line for line in file if not line.startswith('#'))
+
+    rng = random.Random(count)
+    yaml_files = []
+    for i in range(count):
+        dsp = rng.choice(["TTD", "DV360", "StackAdapt", "Yahoo"])
+        media_type = rng.choice(["Display", "Video", "CTV", "Native"])
+        client_dir = os.path.join(root, f"client_{i % 50}")
+        os.makedirs(client_dir, exist_ok=True)
+        path = os.path.join(client_dir, f"Client{i} - Brand - {media_type} - {dsp}_metrics.yaml")
+        with open(path, 'w') as file:
+            file.write(body)
+        yaml_files.append(path)
+    return yaml_files
+
+def time_call(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark example file scanning')
+    parser.add_argument('--sizes', default='250,500,1000,2000', help='Comma separated file counts')
+    parser.add_argument('--skip-legacy', action='store_true', help='Only time the single-pass scan')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    print(f"{'files':>8} {'legacy (s)':>12} {'indexed (s)':>12} {'speedup':>8} {'us/file':>8}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as root:
+            yaml_files = build_repo(root, size)
+
+            indexed_time, indexed = time_call(index_example_files, yaml_files)
+
+            if args.skip_legacy:
+                legacy_col, speedup_col = "-", "-"
+            else:
+                legacy_time, legacy = time_call(legacy_find_example_files, yaml_files)
+                if legacy != indexed:
+                    print(f"Mismatch between legacy and indexed scan for {size} files")
+                    sys.exit(1)
+                legacy_col = f"{legacy_time:.3f}"
+                speedup_col = f"{legacy_time / indexed_time:.1f}x"
+
+            per_file = indexed_time / size * 1e6
+            print(f"{size:>8} {legacy_col:>12} {indexed_time:>12.3f} {speedup_col:>8} {per_file:>8.1f}")
+
+if __name__ == "__main__":
+    main()
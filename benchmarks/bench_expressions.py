@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark column-reference extraction over every bundled measure expression
+
+Compares the original regex + keyword-list extraction with the
+expression_parser tokenizer, both uncached and with its LRU cache warm, and
+lists the expressions where the two disagree.
+
+Usage:
+    python benchmarks/bench_expressions.py [--repeat 200]
+"""
+import os
+import re
+import sys
+import glob
+import time
+import argparse
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import expression_parser
+from template_manager import TemplateCache
+
+LEGACY_KEYWORDS = ['select', 'from', 'where', 'group', 'order', 'by',
+                   'having', 'if', 'case', 'when', 'then', 'else',
+                   'end', 'and', 'or', 'not', 'null', 'true', 'false',
+                   'sum', 'count', 'avg', 'min', 'max', 'stddev',
+                   'distinct', 'as', 'in', 'between', 'is', 'like']
+
+def legacy_extract(expression):
+    """The original TemplateManager.extract_column_references"""
+    quoted_columns = re.findall(r'"([^"]+)"', expression)
+    simple_columns = []
+    for match in re.finditer(r'(?<!\.)(?<!\w)([a-zA-Z_][a-zA-Z0-9_]*)(?!\s*\()', expression):
+        if match.group(1).lower() not in LEGACY_KEYWORDS:
+            simple_columns.append(match.group(1))
+    return set(quoted_columns + simple_columns)
+
+def uncached_extract(expression):
+    expression_parser._tokenize.cache_clear()
+    expression_parser._parse_expression.cache_clear()
+    return expression_parser.extract_columns(expression)
+
+def bundled_expressions():
+    paths = glob.glob(os.path.join(REPO_DIR, "templates", "**", "*.yaml"), recursive=True)
+    paths += glob.glob(os.path.join(REPO_DIR, "presets", "*.yaml"))
+    # Templates that extend others are read in their compiled form
+    cache = TemplateCache()
+    template_dir, preset_dir = os.path.join(REPO_DIR, "templates"), os.path.join(REPO_DIR, "presets")
+    expressions = []
+    for path in sorted(paths):
+        data = cache.load(path, template_dir, preset_dir) or {}
+        for measure in data.get("measures", []):
+            if measure.get("expression"):
+                expressions.append(measure["expression"])
+    return expressions
+
+def time_repeated(func, expressions, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for expression in expressions:
+            func(expression)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark measure expression parsing')
+    parser.add_argument('--repeat', type=int, default=200, help='Passes over the bundled expressions')
+    args = parser.parse_args()
+
+    expressions = bundled_expressions()
+    unique = len(set(expressions))
+    calls = len(expressions) * args.repeat
+
+    legacy_time = time_repeated(legacy_extract, expressions, args.repeat)
+    uncached_time = time_repeated(uncached_extract, expressions, args.repeat)
+    expression_parser._parse_expression.cache_clear()
+    cached_time = time_repeated(expression_parser.extract_columns, expressions, args.repeat)
+
+    print(f"{len(expressions)} expressions ({unique} unique) x {args.repeat} passes")
+    print(f"{'impl':<10} {'seconds':>8} {'us/call':>8}")
+    for name, seconds in [("legacy", legacy_time), ("tokenizer", uncached_time), ("cached", cached_time)]:
+        print(f"{name:<10} {seconds:>8.3f} {seconds / calls * 1e6:>8.2f}")
+    print(f"cache: {expression_parser._parse_expression.cache_info()}")
+
+    differences = [e for e in sorted(set(expressions)) if legacy_extract(e) != expression_parser.extract_columns(e)]
+    print(f"\n{len(differences)} expression(s) classified differently from the legacy regex:")
+    for expression in differences:
+        print(f"  {expression}")
+        print(f"    legacy:    {sorted(legacy_extract(expression))}")
+        print(f"    tokenizer: {sorted(expression_parser.extract_columns(expression))}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark schema extraction from hive-partitioned Parquet datasets
+
+Writes datasets with an increasing number of part files and times
+SchemaExtractor.extract_from_parquet_dataset on each, once with a single
+footer-reading thread and once with the default pool.
+
+Usage:
+    python benchmarks/bench_parquet_dataset.py [--parts 100 400 1600] [--profile]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from data_source import SchemaExtractor, DEFAULT_FOOTER_WORKERS
+
+def build_dataset(root, parts, rows_per_part=1000):
+    """Write `parts` files under root/day=N/ with a small fixed schema"""
+    table = pa.table({
+        "campaign": pa.array([f"c{i % 20}" for i in range(rows_per_part)]),
+        "campaign_id": pa.array([i % 20 for i in range(rows_per_part)], type=pa.int64()),
+        "impressions": pa.array(range(rows_per_part), type=pa.int64()),
+        "spend": pa.array([i * 0.01 for i in range(rows_per_part)])
+    })
+    for part in range(parts):
+        part_dir = os.path.join(root, f"day={part % 365}")
+        os.makedirs(part_dir, exist_ok=True)
+        pq.write_table(table, os.path.join(part_dir, f"part-{part:05d}.parquet"))
+
+def timed_extract(root, profile, max_workers):
+    start = time.perf_counter()
+    schema_info = SchemaExtractor.extract_from_parquet_dataset(root, profile, max_workers=max_workers)
+    return time.perf_counter() - start, schema_info
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark partitioned Parquet schema extraction')
+    parser.add_argument('--parts', type=int, nargs='+', default=[100, 400, 1600], help='Part counts to test')
+    parser.add_argument('--profile', action='store_true', help='Also aggregate footer statistics')
+    args = parser.parse_args()
+
+    print(f"{'parts':>6} {'1 thread':>10} {f'{DEFAULT_FOOTER_WORKERS} threads':>12}")
+    for parts in args.parts:
+        with tempfile.TemporaryDirectory() as root:
+            build_dataset(root, parts)
+            serial_time, _ = timed_extract(root, args.profile, 1)
+            pooled_time, schema_info = timed_extract(root, args.profile, None)
+        assert schema_info["num_files"] == parts
+        print(f"{parts:>6} {serial_time:>9.3f}s {pooled_time:>11.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for metrics_cli.py
+
+Runs a CLI command under `python -X importtime` several times, sums the
+cumulative import time of top-level imports and reports the best run. Exits
+with status 1 if the import time exceeds the budget or if a module that the
+command should not need (pyarrow for `validate`) was imported.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--budget-ms 200]
+    python benchmarks/bench_startup.py --command presets --forbid pyarrow --forbid jsonschema
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI_PATH = os.path.join(REPO_DIR, "metrics_cli.py")
+SAMPLE_FILE = os.path.join(REPO_DIR, "templates", "ttd", "display_template.yaml")
+
+# "import time:       364 |      86120 | jsonschema"
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def run_once(command_args):
+    """Run the CLI once, returning (wall seconds, top-level import us, modules imported)"""
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", CLI_PATH] + command_args,
+        capture_output=True, text=True, cwd=REPO_DIR
+    )
+    wall = time.perf_counter() - start
+
+    total_us = 0
+    modules = set()
+    for line in completed.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        modules.add(match.group(4))
+        # Nested imports are indented; only top-level entries are summed
+        if len(match.group(3)) == 1:
+            total_us += int(match.group(2))
+
+    return wall, total_us, modules, completed.returncode
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark metrics_cli.py cold start')
+    parser.add_argument('--command', default='validate', help='CLI subcommand to run')
+    parser.add_argument('--runs', type=int, default=5, help='Number of runs; the best is reported')
+    parser.add_argument('--budget-ms', type=float, default=200.0, help='Maximum allowed import time')
+    parser.add_argument('--forbid', action='append', help='Top-level package that must not be imported (default: pyarrow)')
+    args = parser.parse_args()
+
+    command_args = [args.command]
+    if args.command == 'validate':
+        command_args.append(SAMPLE_FILE)
+    forbidden = args.forbid or ['pyarrow']
+
+    best_wall, best_import_us = None, None
+    modules = set()
+    for _ in range(args.runs):
+        wall, import_us, modules, returncode = run_once(command_args)
+        if returncode != 0:
+            print(f"metrics_cli.py {' '.join(command_args)} exited with status {returncode}")
+            sys.exit(1)
+        best_wall = wall if best_wall is None else min(best_wall, wall)
+        best_import_us = import_us if best_import_us is None else min(best_import_us, import_us)
+
+    import_ms = best_import_us / 1000
+    print(f"command:     metrics_cli.py {' '.join(command_args)}")
+    print(f"wall time:   {best_wall * 1000:8.1f} ms (best of {args.runs})")
+    print(f"import time: {import_ms:8.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    imported = sorted(name for name in forbidden if any(m == name or m.startswith(name + ".") for m in modules))
+    if imported:
+        print(f"FAIL: imported {', '.join(imported)}")
+        failed = True
+    if import_ms > args.budget_ms:
+        print("FAIL: import time over budget")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark template loading for `create`
+
+Compares parsing the bundled templates and presets from YAML on every load
+(resolving `extends:` by hand) with TemplateCache: a cold compile, a fresh
+process reusing the on-disk compiled table, and warm in-process loads.
+
+Usage:
+    python benchmarks/bench_templates.py [--loads 2000]
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import yaml_io
+from template_manager import TemplateCache, EXTENDS_KEY, merge_template, resolve_template_reference
+
+TEMPLATE_DIR = os.path.join(REPO_DIR, "templates")
+PRESET_DIR = os.path.join(REPO_DIR, "presets")
+
+def parse_every_time(path):
+    """Parse a template and its base templates with no caching"""
+    data = yaml_io.load_file(path)
+    if EXTENDS_KEY in data:
+        base_path = resolve_template_reference(data[EXTENDS_KEY], TEMPLATE_DIR, PRESET_DIR)
+        data = merge_template(parse_every_time(base_path), data)
+    return data
+
+def time_loads(load, paths, loads):
+    start = time.perf_counter()
+    for i in range(loads):
+        load(paths[i % len(paths)])
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark template loading')
+    parser.add_argument('--loads', type=int, default=2000, help='Number of template loads')
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(TEMPLATE_DIR, "**", "*_template.yaml"), recursive=True))
+    paths += sorted(glob.glob(os.path.join(PRESET_DIR, "*.yaml")))
+
+    with tempfile.TemporaryDirectory() as root:
+        compiled_path = os.path.join(root, "compiled_templates.json")
+
+        cache = TemplateCache(compiled_path)
+        start = time.perf_counter()
+        for path in paths:
+            cache.load(path, TEMPLATE_DIR, PRESET_DIR)
+        cache.save()
+        cold_time = time.perf_counter() - start
+
+        # A new process starts from the on-disk table
+        fresh = TemplateCache(compiled_path)
+        start = time.perf_counter()
+        for path in paths:
+            fresh.load(path, TEMPLATE_DIR, PRESET_DIR)
+        fresh_time = time.perf_counter() - start
+        fresh_stats = fresh.stats()
+
+        parse_time = time_loads(parse_every_time, paths, args.loads)
+        warm_time = time_loads(lambda path: fresh.load(path, TEMPLATE_DIR, PRESET_DIR), paths, args.loads)
+
+    print(f"{len(paths)} templates and presets, {args.loads} loads")
+    print(f"cold compile (all):        {cold_time * 1000:8.1f} ms")
+    print(f"from compiled table (all): {fresh_time * 1000:8.1f} ms  {fresh_stats}")
+    print(f"parse every load:          {parse_time / args.loads * 1e6:8.1f} us/load")
+    print(f"warm cache:                {warm_time / args.loads * 1e6:8.1f} us/load")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark schema validation throughput
+
+Compares the original per-call path (load the schema from disk, then
+jsonschema.validate, which re-checks the meta-schema and builds a new
+validator) with the compiled validator cached by validation.get_validator.
+Inputs are the bundled templates and presets, repeated to the requested count.
+
+Usage:
+    python benchmarks/bench_validation.py [--files 5000]
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+
+import jsonschema
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from template_manager import TemplateCache
+from validation import load_schema, comprehensive_validation
+
+def legacy_validate(data):
+    """The original validate_yaml: schema load and full validate per call"""
+    schema = load_schema()
+    try:
+        jsonschema.validate(instance=data, schema=schema)
+        return True
+    except jsonschema.exceptions.ValidationError:
+        return False
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark schema validation')
+    parser.add_argument('--files', type=int, default=5000, help='Number of views to validate')
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(REPO_DIR, "templates", "**", "*.yaml"), recursive=True))
+    paths += sorted(glob.glob(os.path.join(REPO_DIR, "presets", "*.yaml")))
+    # Templates that extend others are validated in their compiled form
+    cache = TemplateCache()
+    template_dir, preset_dir = os.path.join(REPO_DIR, "templates"), os.path.join(REPO_DIR, "presets")
+    views = [cache.load(path, template_dir, preset_dir) for path in paths]
+    inputs = [views[i % len(views)] for i in range(args.files)]
+
+    start = time.perf_counter()
+    for data in inputs:
+        legacy_validate(data)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for data in inputs:
+        comprehensive_validation(data)
+    cached_time = time.perf_counter() - start
+
+    print(f"views validated: {args.files}")
+    print(f"legacy:   {legacy_time:8.3f}s  {args.files / legacy_time:10.0f} files/sec")
+    print(f"compiled: {cached_time:8.3f}s  {args.files / cached_time:10.0f} files/sec")
+    print(f"speedup:  {legacy_time / cached_time:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for holding a whole fleet of metrics views at once
+
+Loads every view either as plain dicts (what yaml_io returns) or as
+MetricsView objects with Dimension/Measure records, keeping all of them
+alive, and reports the memory retained and the peak as measured by
+tracemalloc. Without --dir a synthetic fleet is written from the bundled
+templates with per-client names.
+
+Usage:
+    python benchmarks/bench_view_memory.py [--views 2000]
+    python benchmarks/bench_view_memory.py --dir /path/to/metrics
+"""
+import os
+import gc
+import sys
+import glob
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import yaml_io
+from metrics_view import MetricsView
+from template_manager import TemplateCache
+
+def build_fleet(root, views):
+    """Write `views` client files based on the bundled templates"""
+    template_dir = os.path.join(REPO_DIR, "templates")
+    cache = TemplateCache()
+    templates = [
+        cache.load(path, template_dir, os.path.join(REPO_DIR, "presets"))
+        for path in sorted(glob.glob(os.path.join(template_dir, "**", "*_template.yaml"), recursive=True))
+    ]
+
+    paths = []
+    for i in range(views):
+        data = templates[i % len(templates)]
+        data["model"] = f"Client {i} - Brand {i % 37}"
+        data["display_name"] = f"Client {i} - Brand {i % 37} Metrics"
+        path = os.path.join(root, f"client_{i:05d}_metrics.yaml")
+        with open(path, 'w') as file:
+            yaml_io.dump(data, file)
+        paths.append(path)
+    return paths
+
+def measure(load, paths):
+    """Load every path with `load`, returning (retained bytes, peak bytes, seconds)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    fleet = [load(path) for path in paths]
+    seconds = time.perf_counter() - start
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del fleet
+    return current, peak, seconds
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark memory used by a fleet of loaded views')
+    parser.add_argument('--views', type=int, default=2000, help='Number of synthetic views')
+    parser.add_argument('--dir', help='Load every *.yaml under this directory instead')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        if args.dir:
+            paths = sorted(glob.glob(os.path.join(args.dir, "**", "*.yaml"), recursive=True))
+        else:
+            paths = build_fleet(root, args.views)
+
+        dict_current, dict_peak, dict_time = measure(yaml_io.load_file, paths)
+        view_current, view_peak, view_time = measure(
+            lambda path: MetricsView.from_dict(yaml_io.load_file(path)), paths
+        )
+
+    mb = 1024 * 1024
+    print(f"views: {len(paths)}")
+    print(f"{'form':<12} {'retained':>10} {'peak':>10} {'seconds':>8}")
+    print(f"{'dicts':<12} {dict_current / mb:>8.1f}MB {dict_peak / mb:>8.1f}MB {dict_time:>8.2f}")
+    print(f"{'MetricsView':<12} {view_current / mb:>8.1f}MB {view_peak / mb:>8.1f}MB {view_time:>8.2f}")
+    print(f"retained per view: {dict_current / len(paths) / 1024:.1f}KB -> {view_current / len(paths) / 1024:.1f}KB")
+
+if __name__ == "__main__":
+    main()
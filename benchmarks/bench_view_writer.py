@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark writing a large generated metrics view
+
+Compares yaml_io.dump of the whole dict into an open file (the previous
+way every writer worked) with view_writer.write_view fed from generators,
+reporting time and peak memory as measured by tracemalloc, and the time
+of a rewrite that is skipped because the file's recorded content hash
+already matches.
+
+Usage:
+    python benchmarks/bench_view_writer.py [--measures 20000]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import yaml_io
+from view_writer import write_view
+
+HEADER = "# Metrics view YAML - benchmark\n\n"
+
+def top_level():
+    return {
+        "version": 1,
+        "type": "metrics_view",
+        "display_name": "Benchmark Metrics",
+        "model": "benchmark",
+        "timeseries": "date"
+    }
+
+def dimensions(count):
+    for i in range(count):
+        yield {"name": f"dimension_{i}", "display_name": f"Dimension {i}", "column": f"dimension_{i}"}
+
+def measures(count):
+    for i in range(count):
+        yield {
+            "name": f"measure_{i}",
+            "display_name": f"Measure {i}",
+            "expression": f"SUM(column_{i}) / NULLIF(SUM(impressions), 0)",
+            "description": f"Ratio of column_{i} to impressions",
+            "format_preset": "humanize",
+            "valid_percent_of_total": False
+        }
+
+def dump_whole(path, args):
+    data = top_level()
+    data["dimensions"] = list(dimensions(args.dimensions))
+    data["measures"] = list(measures(args.measures))
+    with open(path, 'w') as file:
+        file.write(HEADER)
+        yaml_io.dump(data, file)
+
+def write_items(path, args):
+    data = top_level()
+    data["dimensions"] = dimensions(args.dimensions)
+    data["measures"] = measures(args.measures)
+    return write_view(path, data, HEADER)
+
+def measure(write, path, args):
+    """Run write, returning (seconds, peak bytes)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    write(path, args)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark writing a large metrics view')
+    parser.add_argument('--measures', type=int, default=20000, help='Number of generated measures')
+    parser.add_argument('--dimensions', type=int, default=2000, help='Number of generated dimensions')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        dump_path = os.path.join(root, "dump.yaml")
+        items_path = os.path.join(root, "items.yaml")
+
+        dump_time, dump_peak = measure(dump_whole, dump_path, args)
+        items_time, items_peak = measure(write_items, items_path, args)
+
+        start = time.perf_counter()
+        rewritten = write_items(items_path, args)
+        skip_time = time.perf_counter() - start
+
+        size = os.path.getsize(items_path)
+
+    mb = 1024 * 1024
+    print(f"{args.dimensions} dimensions, {args.measures} measures, {size / mb:.1f}MB file")
+    print(f"{'writer':<16} {'seconds':>8} {'peak':>10}")
+    print(f"{'dump whole dict':<16} {dump_time:>8.2f} {dump_peak / mb:>8.1f}MB")
+    print(f"{'write_view':<16} {items_time:>8.2f} {items_peak / mb:>8.1f}MB")
+    print(f"unchanged rewrite: {skip_time:.2f}s ({'written' if rewritten else 'skipped'})")
+
+if __name__ == "__main__":
+    main()
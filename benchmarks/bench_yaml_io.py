@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Parse/emit microbenchmark for the bundled templates and presets
+
+Compares PyYAML's pure-Python SafeLoader/SafeDumper with the libyaml
+CSafeLoader/CSafeDumper used by yaml_io, and checks that both produce the
+same data and the same emitted text.
+
+Usage:
+    python benchmarks/bench_yaml_io.py [--repeat 20]
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+
+import yaml
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import yaml_io
+
+def bundled_files():
+    files = glob.glob(os.path.join(REPO_DIR, "templates", "**", "*.yaml"), recursive=True)
+    files += glob.glob(os.path.join(REPO_DIR, "presets", "*.yaml"))
+    return sorted(files)
+
+def time_repeated(func, items, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            func(item)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark YAML parse/emit implementations')
+    parser.add_argument('--repeat', type=int, default=20, help='Passes over the bundled files')
+    args = parser.parse_args()
+
+    if not yaml_io.HAS_LIBYAML:
+        print("PyYAML was built without libyaml; only the pure-Python path is available")
+        sys.exit(1)
+
+    files = bundled_files()
+    texts = []
+    for path in files:
+        with open(path, 'r') as file:
+            texts.append(file.read())
+
+    # Both implementations must agree before timing means anything
+    datas = []
+    for path, text in zip(files, texts):
+        py_data = yaml_io.safe_load(text, loader=yaml.SafeLoader)
+        c_data = yaml_io.safe_load(text, loader=yaml.CSafeLoader)
+        if py_data != c_data:
+            print(f"Parsed data differs for {path}")
+            sys.exit(1)
+        if yaml_io.dump(py_data, dumper=yaml.SafeDumper) != yaml_io.dump(py_data, dumper=yaml.CSafeDumper):
+            print(f"Emitted text differs for {path}")
+            sys.exit(1)
+        datas.append(py_data)
+
+    total_bytes = sum(len(text) for text in texts) * args.repeat
+    results = [
+        ("parse", "python", time_repeated(lambda text: yaml_io.safe_load(text, loader=yaml.SafeLoader), texts, args.repeat)),
+        ("parse", "libyaml", time_repeated(lambda text: yaml_io.safe_load(text, loader=yaml.CSafeLoader), texts, args.repeat)),
+        ("emit", "python", time_repeated(lambda data: yaml_io.dump(data, dumper=yaml.SafeDumper), datas, args.repeat)),
+        ("emit", "libyaml", time_repeated(lambda data: yaml_io.dump(data, dumper=yaml.CSafeDumper), datas, args.repeat)),
+    ]
+
+    print(f"{len(files)} files x {args.repeat} passes ({total_bytes / 1e6:.1f} MB)")
+    print(f"{'op':<6} {'impl':<8} {'seconds':>8} {'MB/s':>8}")
+    for op, impl, seconds in results:
+        print(f"{op:<6} {impl:<8} {seconds:>8.3f} {total_bytes / seconds / 1e6:>8.2f}")
+    print(f"parse speedup: {results[0][2] / results[1][2]:.1f}x, emit speedup: {results[2][2] / results[3][2]:.1f}x")
+
+if __name__ == "__main__":
+    main()
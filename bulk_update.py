@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Update many metrics YAML files from their source Parquet files
+
+A mapping file pairs each metrics YAML file with the Parquet file, directory
+or glob it is derived from. All Parquet footers are read first, concurrently
+on a thread pool (each distinct source is read once even if several YAML
+files share it). The updates are then computed over a pool of worker
+processes and only files that gain new dimensions or measures are written.
+
+Usage:
+    python bulk_update.py mapping.yaml [--jobs 4] [--threads 16] [--profile] [--sample-rows N] [--report report.json]
+"""
+import os
+import sys
+import csv
+import json
+import time
+import yaml_io
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from data_source import SchemaExtractor, DEFAULT_FOOTER_WORKERS
+
+def _resolve(path, base_dir):
+    path = os.path.expanduser(str(path).strip())
+    return path if os.path.isabs(path) else os.path.join(base_dir, path)
+
+def load_mapping(mapping_path):
+    """Load (yaml, parquet, output) entries from a YAML, CSV or JSON lines mapping
+
+    A YAML mapping may be a plain dict of YAML path -> Parquet path or a list
+    of {yaml, parquet, output} rows; CSV and JSON lines files use the same
+    column names. Relative paths are resolved against the mapping file's
+    directory. output is optional and defaults to the YAML file itself.
+
+    Returns:
+        List of dicts with "yaml", "parquet" and "output" keys
+    """
+    extension = os.path.splitext(mapping_path)[1].lower()
+    base_dir = os.path.dirname(os.path.abspath(mapping_path))
+
+    with open(mapping_path, 'r', newline='') as file:
+        if extension == ".csv":
+            rows = list(csv.DictReader(file))
+        elif extension in (".yaml", ".yml"):
+            data = yaml_io.safe_load(file) or []
+            if isinstance(data, dict):
+                rows = [{"yaml": yaml_file, "parquet": parquet} for yaml_file, parquet in data.items()]
+            else:
+                rows = data
+            if not isinstance(rows, list):
+                raise ValueError(f"Mapping must be a dict or a list of entries: {mapping_path}")
+        elif extension in (".jsonl", ".ndjson"):
+            rows = [json.loads(line) for line in file if line.strip()]
+        else:
+            raise ValueError(f"Unsupported mapping format: {mapping_path}")
+
+    entries = []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise ValueError(f"Mapping entry {index} is not a mapping: {row!r}")
+        if not row.get("yaml") or not row.get("parquet"):
+            raise ValueError(f"Mapping entry {index} needs both 'yaml' and 'parquet'")
+        yaml_file = _resolve(row["yaml"], base_dir)
+        entries.append({
+            "yaml": yaml_file,
+            "parquet": _resolve(row["parquet"], base_dir),
+            "output": _resolve(row["output"], base_dir) if row.get("output") else yaml_file
+        })
+    return entries
+
+def _rejected_entry(entry, error):
+    """Result for an entry that is not run"""
+    return {
+        "yaml": entry["yaml"],
+        "parquet": entry["parquet"],
+        "output": entry["output"],
+        "success": False,
+        "written": False,
+        "dimensions_added": [],
+        "measures_added": [],
+        "errors": [error],
+        "seconds": 0.0
+    }
+
+def _update_entry(entry, schema_info):
+    """Apply one schema to one YAML file"""
+    start = time.perf_counter()
+    result = {
+        "yaml": entry["yaml"],
+        "parquet": entry["parquet"],
+        "output": entry["output"],
+        "success": False,
+        "written": False,
+        "dimensions_added": [],
+        "measures_added": [],
+        "errors": []
+    }
+
+    if schema_info is None:
+        result["errors"].append(f"Failed to extract schema from Parquet file: {entry['parquet']}")
+    elif not os.path.isfile(entry["yaml"]):
+        result["errors"].append(f"YAML file not found: {entry['yaml']}")
+    else:
+        update = SchemaExtractor.update_existing_yaml_file(entry["yaml"], schema_info, entry["output"])
+        if update is None:
+            result["errors"].append(f"Failed to update YAML file: {entry['yaml']}")
+        else:
+            result["success"] = True
+            result["written"] = update["written"]
+            result["dimensions_added"] = update["dimensions_added"]
+            result["measures_added"] = update["measures_added"]
+
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def bulk_update(mapping_path, jobs=1, threads=None, profile=False, sample_rows=None):
+    """Update every YAML file in a mapping from its Parquet source
+
+    Args:
+        mapping_path: Path to a YAML, CSV or JSON lines mapping
+        jobs: Number of worker processes computing and writing updates
+        threads: Number of threads reading Parquet footers
+        profile: Use footer statistics when guessing columns
+        sample_rows: Rows to sample per source for cardinality estimates
+
+    Returns:
+        Summary dict with per-file results in mapping order and phase timings
+    """
+    start = time.perf_counter()
+    entries = load_mapping(mapping_path)
+
+    # Read each distinct source once. Directory sources read their parts on
+    # a pool of their own, so the thread budget is split between the two
+    # levels rather than multiplied
+    sources = list(dict.fromkeys(entry["parquet"] for entry in entries))
+    budget = threads or DEFAULT_FOOTER_WORKERS
+    source_workers = max(1, min(budget, len(sources)))
+    part_workers = max(1, budget // source_workers)
+    with ThreadPoolExecutor(max_workers=source_workers) as executor:
+        schemas = dict(zip(sources, executor.map(
+            lambda source: SchemaExtractor.extract_from_parquet(source, profile, sample_rows, part_workers),
+            sources
+        )))
+    footer_seconds = time.perf_counter() - start
+
+    # Two entries writing the same file would race in the process pool, so
+    # only the first entry for each output is run
+    tasks = []
+    rejected = {}
+    outputs = {}
+    for index, entry in enumerate(entries):
+        key = os.path.abspath(entry["output"])
+        if key in outputs:
+            rejected[index] = _rejected_entry(entry, f"Output {entry['output']} is also written by entry {outputs[key]}")
+            continue
+        outputs[key] = index
+        tasks.append((entry, schemas[entry["parquet"]]))
+    
+    if jobs and jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(_update_entry, *task) for task in tasks]
+            updated = [future.result() for future in futures]
+    else:
+        updated = [_update_entry(*task) for task in tasks]
+    
+    # Back into mapping order
+    updated = iter(updated)
+    results = [rejected[index] if index in rejected else next(updated) for index in range(len(entries))]
+
+    succeeded = sum(1 for result in results if result["success"])
+    written = sum(1 for result in results if result["written"])
+
+    return {
+        "mapping": mapping_path,
+        "total": len(results),
+        "sources": len(sources),
+        "written": written,
+        "unchanged": succeeded - written,
+        "failed": len(results) - succeeded,
+        "jobs": max(jobs or 1, 1),
+        "threads": threads or DEFAULT_FOOTER_WORKERS,
+        "footer_seconds": footer_seconds,
+        "update_seconds": time.perf_counter() - start - footer_seconds,
+        "seconds": time.perf_counter() - start,
+        "files": results
+    }
+
+def write_report(summary, report_path):
+    """Write a bulk update summary as JSON"""
+    with open(report_path, 'w') as file:
+        json.dump(summary, file, indent=2)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Update metrics YAML files from their Parquet sources')
+    parser.add_argument('mapping', help='YAML, CSV or JSON lines mapping of YAML file to Parquet source')
+    parser.add_argument('--jobs', type=int, default=1, help='Number of worker processes for updates')
+    parser.add_argument('--threads', type=int, help='Number of threads reading Parquet footers')
+    parser.add_argument('--profile', action='store_true', help='Use Parquet footer statistics to tell ID columns from measures')
+    parser.add_argument('--sample-rows', type=int, help='Read up to N rows per source to estimate column cardinality')
+    parser.add_argument('--report', help='Path for a JSON summary report')
+    args = parser.parse_args()
+
+    summary = bulk_update(
+        args.mapping, jobs=args.jobs, threads=args.threads,
+        profile=args.profile, sample_rows=args.sample_rows
+    )
+    print(f"{summary['written']} written, {summary['unchanged']} unchanged, {summary['failed']} failed "
+          f"of {summary['total']} files in {summary['seconds']:.2f}s")
+    if args.report:
+        write_report(summary, args.report)
+    if summary["failed"]:
+        sys.exit(1)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+HyperLogLog cardinality sketch
+
+Estimates the number of distinct values seen in a stream using a fixed
+number of one-byte registers (2 ** precision), so memory stays constant no
+matter how many values are added. With the default precision of 12 the
+sketch uses 4 KB and the typical relative error is about 1.6%.
+"""
+import math
+import hashlib
+
+class HyperLogLog:
+    """Fixed-memory distinct-count estimator"""
+
+    __slots__ = ("precision", "num_registers", "registers")
+
+    def __init__(self, precision=12):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.num_registers = 1 << precision
+        self.registers = bytearray(self.num_registers)
+
+    @staticmethod
+    def _hash(value):
+        """64-bit hash that is stable across processes (unlike hash())"""
+        if not isinstance(value, bytes):
+            value = str(value).encode("utf-8")
+        return int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), "big")
+
+    def add(self, value):
+        """Add one value to the sketch"""
+        hashed = self._hash(value)
+        index = hashed >> (64 - self.precision)
+        remainder = hashed & ((1 << (64 - self.precision)) - 1)
+        # Position of the leftmost 1 bit in the remaining bits
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values):
+        """Add every value from an iterable"""
+        for value in values:
+            self.add(value)
+
+    def merge(self, other):
+        """Fold another sketch of the same precision into this one"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def estimate(self):
+        """Estimated number of distinct values added"""
+        m = self.num_registers
+        if m >= 128:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[m]
+
+        raw = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+
+        # Small-range correction: linear counting while registers are still empty
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
-import yaml
+import yaml_io
 import sys
 
 def print_dataset_info(file_path):
     print(f"Analyzing file: {file_path}")
     
-    with open(file_path, 'r') as f:
-        yaml_data = yaml.safe_load(f)
+    yaml_data, header_lines = yaml_io.load_file_with_header(file_path)
+    
+    # Provenance recorded in the comment header by the generator
+    metadata = yaml_io.parse_header(header_lines)
+    for label, key in [("Generated on", "generated_on"), ("Based on template", "based_on_template")]:
+        if key in metadata:
+            print(f"{label}: {metadata[key]}")
     
     print('\nAvailable dimensions/columns:')
     for dim in yaml_data.get('dimensions', []):
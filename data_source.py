@@ -1,18 +1,159 @@
 #!/usr/bin/env python3
 import os
 import re
+import copy
+import glob
 import json
+import hashlib
+import tempfile
+import yaml_io
+from metrics_view import MetricsView
+from view_writer import write_view, write_text, restamp_text
+from concurrent.futures import ThreadPoolExecutor
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
 import pyarrow.parquet as pq
+from cardinality import HyperLogLog
+
+# Integer columns named like identifiers ("campaign_id", "dma_code")
+INTEGER_TYPE_PATTERN = re.compile(r"^u?int\d*$", re.IGNORECASE)
+ID_COLUMN_PATTERN = re.compile(r"(?:^|_)(?:id|key|code)$", re.IGNORECASE)
+
+# Profiled ID columns with at most this many distinct values become dimensions
+LOW_CARDINALITY_MAX = 1000
+
+# Sampled columns with at least this ratio of distinct values to rows are
+# treated as unique identifiers; tiny samples are not trusted
+NEAR_UNIQUE_RATIO = 0.9
+NEAR_UNIQUE_MIN_ROWS = 100
+
+FLOAT_TYPE_PATTERN = re.compile(r"float|double|halffloat|decimal", re.IGNORECASE)
+# Struct, list, map and union values can't be counted distinct
+NESTED_TYPE_PATTERN = re.compile(r"^(struct|list|large_list|fixed_size_list|map|dense_union|sparse_union)<")
+
+GLOB_CHARS = re.compile(r"[*?\[]")
+
+# Footer reads are I/O bound, so the pool can be wider than the CPU count
+DEFAULT_FOOTER_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+SCHEMA_CACHE_PATH = os.path.expanduser("~/yaml-generator/schema_cache.json")
+SCHEMA_CACHE_MAX_ENTRIES = 256
+# Bump when the column guessing changes so stale structures are not reused
+SCHEMA_CACHE_VERSION = 1
+
+def schema_fingerprint(schema):
+    """Stable hash of an Arrow schema's column names, types and nullability
+    
+    Schema metadata (e.g. the pandas block written by to_parquet) is ignored,
+    so files rewritten with identical columns share a fingerprint.
+    """
+    text = "\n".join(f"{field.name}\t{field.type}\t{field.nullable}" for field in schema)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+class SchemaCache:
+    """On-disk LRU cache of generated metrics views keyed by schema fingerprint
+    
+    Entries are kept in least- to most-recently-used order; once there are
+    more than max_entries the oldest are evicted. The file is only rewritten
+    by save() when something changed.
+    """
+    
+    def __init__(self, cache_path=None, max_entries=SCHEMA_CACHE_MAX_ENTRIES):
+        """Load the cache from disk, starting empty if it is missing or stale"""
+        self.cache_path = cache_path or SCHEMA_CACHE_PATH
+        self.max_entries = max_entries
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._dirty = False
+        
+        try:
+            with open(self.cache_path, 'r') as file:
+                data = json.load(file)
+            if data.get("version") == SCHEMA_CACHE_VERSION:
+                self.entries = data.get("entries", {})
+        except (OSError, ValueError):
+            pass
+    
+    def get(self, fingerprint):
+        """Return a copy of the cached metrics view for a fingerprint, or None"""
+        metrics_yaml = self.entries.get(fingerprint)
+        if metrics_yaml is None:
+            self.misses += 1
+            return None
+        
+        # Move to the end to mark as most recently used; the file only needs
+        # rewriting if that changes the order
+        if next(reversed(self.entries)) != fingerprint:
+            del self.entries[fingerprint]
+            self.entries[fingerprint] = metrics_yaml
+            self._dirty = True
+        self.hits += 1
+        return copy.deepcopy(metrics_yaml)
+    
+    def put(self, fingerprint, metrics_yaml):
+        """Store a metrics view, evicting least recently used entries"""
+        self.entries.pop(fingerprint, None)
+        self.entries[fingerprint] = copy.deepcopy(metrics_yaml)
+        self._dirty = True
+        
+        while len(self.entries) > self.max_entries:
+            del self.entries[next(iter(self.entries))]
+            self.evictions += 1
+    
+    def save(self):
+        """Write the cache to disk atomically if it changed"""
+        if not self._dirty:
+            return
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        os.makedirs(directory, exist_ok=True)
+        # A unique temporary file, so concurrent runs never replace the cache
+        # with each other's partial write
+        file = tempfile.NamedTemporaryFile(
+            mode='w', encoding="utf-8", dir=directory,
+            prefix=f".{os.path.basename(self.cache_path)}.", suffix=".tmp", delete=False
+        )
+        try:
+            with file:
+                json.dump({"version": SCHEMA_CACHE_VERSION, "entries": self.entries}, file, separators=(",", ":"))
+            os.replace(file.name, self.cache_path)
+        except BaseException:
+            if os.path.exists(file.name):
+                os.remove(file.name)
+            raise
+        self._dirty = False
+    
+    def stats(self):
+        """Hit/miss counts for this session"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.entries),
+            "evictions": self.evictions
+        }
 
 class SchemaExtractor:
     """Extract schema information from data sources"""
     
     @staticmethod
-    def extract_from_parquet(file_path):
-        """Extract schema information from a Parquet file"""
+    def extract_from_parquet(file_path, profile=False, sample_rows=None, max_workers=None):
+        """Extract schema information from a Parquet file
+        
+        A directory or glob is read as a partitioned dataset (see
+        extract_from_parquet_dataset), with footers read on up to max_workers
+        threads. With profile=True each field also gets
+        a "stats" dict aggregated from the footer's row group statistics (see
+        profile_parquet). With sample_rows, the first sample_rows rows are
+        read to estimate per-column cardinality (see sample_cardinality).
+        """
+        if SchemaExtractor.is_parquet_dataset(file_path):
+            return SchemaExtractor.extract_from_parquet_dataset(file_path, profile, sample_rows, max_workers)
+        
         try:
             parquet_file = pq.ParquetFile(file_path)
-            schema = parquet_file.schema
+            schema = parquet_file.schema_arrow
             
             # Extract fields
             fields = []
@@ -23,6 +164,19 @@ class SchemaExtractor:
                     "nullable": field.nullable
                 })
             
+            if profile:
+                column_stats = SchemaExtractor.profile_parquet(parquet_file)
+                for field in fields:
+                    if field["name"] in column_stats:
+                        field["stats"] = column_stats[field["name"]]
+            
+            if sample_rows:
+                columns = SchemaExtractor.sampled_columns(fields)
+                sampled = SchemaExtractor.sample_cardinality(parquet_file, sample_rows, columns)
+                for field in fields:
+                    if field["name"] in sampled:
+                        field.setdefault("stats", {}).update(sampled[field["name"]])
+            
             return {
                 "fields": fields,
                 "num_rows": parquet_file.metadata.num_rows,
@@ -32,6 +186,410 @@ class SchemaExtractor:
             print(f"Error extracting schema from Parquet file: {e}")
             return None
     
+    @staticmethod
+    def is_parquet_dataset(source):
+        """Whether source names a directory or glob of part files rather than one file"""
+        return os.path.isdir(source) or bool(GLOB_CHARS.search(source))
+    
+    @staticmethod
+    def open_parquet_dataset(source):
+        """Discover the part files and hive partition keys of a Parquet dataset
+        
+        Only file names are listed here; no part file is opened.
+        """
+        if os.path.isdir(source):
+            return ds.dataset(source, format="parquet", partitioning="hive")
+        
+        paths = sorted(path for path in glob.glob(source, recursive=True) if os.path.isfile(path))
+        if not paths:
+            raise FileNotFoundError(f"No Parquet files match {source}")
+        
+        # Partition directories start below the fixed part of the pattern
+        base_parts = []
+        for part in source.split(os.sep):
+            if GLOB_CHARS.search(part):
+                break
+            base_parts.append(part)
+        base_dir = os.sep.join(base_parts) or "."
+        
+        return ds.dataset(paths, format="parquet", partitioning="hive", partition_base_dir=base_dir)
+    
+    @staticmethod
+    def read_parquet_footer(path, profile=False):
+        """Read the schema and row counts of one part file from its footer"""
+        parquet_file = pq.ParquetFile(path)
+        metadata = parquet_file.metadata
+        return {
+            "path": path,
+            "schema": parquet_file.schema_arrow,
+            "num_rows": metadata.num_rows,
+            "num_row_groups": metadata.num_row_groups,
+            "stats": SchemaExtractor.profile_parquet(parquet_file) if profile else None
+        }
+    
+    @staticmethod
+    def unify_part_schemas(parts):
+        """Merge the schemas of a dataset's part files
+        
+        Columns keep the order in which they first appear. Types that differ
+        between parts are promoted to a common type where Arrow allows it
+        (e.g. int32 and int64 become int64); otherwise the first type wins.
+        
+        Returns:
+            (fields, drift) where fields is a list of pa.Field and drift is
+            {"added_columns": {name: parts with the column},
+             "type_changes": {name: [type, ...]}}
+        """
+        columns = {}
+        for part in parts:
+            for field in part["schema"]:
+                columns.setdefault(field.name, []).append(field)
+        
+        fields = []
+        drift = {"added_columns": {}, "type_changes": {}}
+        for name, variants in columns.items():
+            if len(variants) < len(parts):
+                drift["added_columns"][name] = len(variants)
+            
+            types = []
+            for field in variants:
+                if str(field.type) not in types:
+                    types.append(str(field.type))
+            if len(types) == 1:
+                fields.append(variants[0])
+                continue
+            
+            drift["type_changes"][name] = types
+            try:
+                fields.append(pa.unify_schemas(
+                    [pa.schema([field]) for field in variants],
+                    promote_options="permissive"
+                ).field(name))
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                fields.append(variants[0])
+        
+        return fields, drift
+    
+    @staticmethod
+    def extract_from_parquet_dataset(source, profile=False, sample_rows=None, max_workers=None):
+        """Extract schema information from a directory or glob of Parquet files
+        
+        Part files are discovered with pyarrow.dataset and only their footers
+        are read, concurrently on a thread pool, so wall time grows with the
+        number of parts divided by the pool size rather than with data size.
+        Part schemas are unified and any drift between them is reported under
+        "drift". Hive partition keys (year=2024/...) are added as fields with
+        "partition": True; they are dimension candidates, never measures.
+        """
+        try:
+            dataset = SchemaExtractor.open_parquet_dataset(source)
+            paths = dataset.files
+            if not paths:
+                raise FileNotFoundError(f"No Parquet files found in {source}")
+            
+            max_workers = max_workers or DEFAULT_FOOTER_WORKERS
+            if max_workers == 1 or len(paths) == 1:
+                parts = [SchemaExtractor.read_parquet_footer(path, profile) for path in paths]
+            else:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    parts = list(executor.map(lambda path: SchemaExtractor.read_parquet_footer(path, profile), paths))
+            
+            unified, drift = SchemaExtractor.unify_part_schemas(parts)
+            fields = [
+                {"name": field.name, "type": str(field.type), "nullable": field.nullable}
+                for field in unified
+            ]
+            
+            if profile:
+                column_stats = SchemaExtractor.merge_column_profiles(part["stats"] for part in parts)
+                for field in fields:
+                    if field["name"] in column_stats:
+                        field["stats"] = column_stats[field["name"]]
+            
+            if sample_rows:
+                columns = SchemaExtractor.sampled_columns(fields)
+                sketches = {column: HyperLogLog() for column in columns}
+                non_null = dict.fromkeys(columns, 0)
+                rows_read = 0
+                # Leading parts only, until the sample is covered
+                for part in parts:
+                    if rows_read >= sample_rows:
+                        break
+                    part_columns = [column for column in columns if column in part["schema"].names]
+                    rows_read += SchemaExtractor._sample_sketches(
+                        pq.ParquetFile(part["path"]), sample_rows - rows_read, part_columns, sketches, non_null
+                    )
+                for field in fields:
+                    if field["name"] in sketches:
+                        field.setdefault("stats", {}).update({
+                            "sampled_rows": rows_read,
+                            "sampled_non_null": non_null[field["name"]],
+                            "sampled_distinct": min(sketches[field["name"]].estimate(), non_null[field["name"]])
+                        })
+            
+            # Partition keys come from the directory names, not the files
+            partitioning = getattr(dataset, "partitioning", None)
+            if partitioning is not None:
+                partition_values = {}
+                if profile:
+                    for fragment in dataset.get_fragments():
+                        for key, value in ds.get_partition_keys(fragment.partition_expression).items():
+                            partition_values.setdefault(key, set()).add(value)
+                
+                existing = {field["name"] for field in fields}
+                for field in partitioning.schema:
+                    if field.name in existing:
+                        continue
+                    partition_field = {
+                        "name": field.name,
+                        "type": str(field.type),
+                        "nullable": True,
+                        "partition": True
+                    }
+                    values = partition_values.get(field.name)
+                    if values:
+                        partition_field["stats"] = {
+                            "min": min(values),
+                            "max": max(values),
+                            "null_count": None,
+                            "num_values": None,
+                            "distinct_count": len(values)
+                        }
+                    fields.append(partition_field)
+            
+            return {
+                "fields": fields,
+                "num_rows": sum(part["num_rows"] for part in parts),
+                "num_row_groups": sum(part["num_row_groups"] for part in parts),
+                "num_files": len(parts),
+                "drift": drift
+            }
+        except Exception as e:
+            print(f"Error extracting schema from Parquet dataset: {e}")
+            return None
+    
+    @staticmethod
+    def profile_parquet(parquet_file):
+        """Aggregate per-column statistics from a Parquet footer
+        
+        Only the footer metadata is read, so the cost is proportional to the
+        number of row groups and columns, never to the data size.
+        
+        Args:
+            parquet_file: Path or pq.ParquetFile
+            
+        Returns:
+            Dict of column name -> {"min", "max", "null_count", "num_values",
+            "distinct_count"}. Values are None where the writer did not record
+            them; distinct_count is a lower bound when there are several row groups.
+        """
+        if not isinstance(parquet_file, pq.ParquetFile):
+            parquet_file = pq.ParquetFile(parquet_file)
+        metadata = parquet_file.metadata
+        
+        profile = {}
+        for row_group_index in range(metadata.num_row_groups):
+            row_group = metadata.row_group(row_group_index)
+            for column_index in range(row_group.num_columns):
+                column = row_group.column(column_index)
+                stats = profile.setdefault(column.path_in_schema, {
+                    "min": None,
+                    "max": None,
+                    "null_count": 0,
+                    "num_values": 0,
+                    "distinct_count": None
+                })
+                stats["num_values"] += column.num_values
+                
+                statistics = column.statistics
+                if statistics is None:
+                    # Without statistics the aggregate counts are unknown
+                    stats["null_count"] = None
+                    continue
+                
+                if statistics.has_null_count and stats["null_count"] is not None:
+                    stats["null_count"] += statistics.null_count
+                elif not statistics.has_null_count:
+                    stats["null_count"] = None
+                
+                if statistics.has_min_max:
+                    try:
+                        if stats["min"] is None or statistics.min < stats["min"]:
+                            stats["min"] = statistics.min
+                        if stats["max"] is None or statistics.max > stats["max"]:
+                            stats["max"] = statistics.max
+                    except TypeError:
+                        pass
+                
+                if statistics.has_distinct_count:
+                    stats["distinct_count"] = max(stats["distinct_count"] or 0, statistics.distinct_count)
+        
+        return profile
+    
+    @staticmethod
+    def merge_column_profiles(profiles):
+        """Combine profile_parquet results from several part files"""
+        merged = {}
+        for profile in profiles:
+            for name, stats in profile.items():
+                if name not in merged:
+                    merged[name] = dict(stats)
+                    continue
+                
+                target = merged[name]
+                target["num_values"] += stats["num_values"]
+                if target["null_count"] is None or stats["null_count"] is None:
+                    target["null_count"] = None
+                else:
+                    target["null_count"] += stats["null_count"]
+                
+                try:
+                    if stats["min"] is not None and (target["min"] is None or stats["min"] < target["min"]):
+                        target["min"] = stats["min"]
+                    if stats["max"] is not None and (target["max"] is None or stats["max"] > target["max"]):
+                        target["max"] = stats["max"]
+                except TypeError:
+                    pass
+                
+                if stats["distinct_count"] is not None:
+                    target["distinct_count"] = max(target["distinct_count"] or 0, stats["distinct_count"])
+        
+        return merged
+    
+    @staticmethod
+    def sampled_columns(fields):
+        """Names of the fields whose cardinality is worth sampling
+        
+        Floating point columns are always measures, and nested columns
+        (structs, lists, maps) can't be counted, so both are skipped.
+        """
+        return [
+            field["name"] for field in fields
+            if not FLOAT_TYPE_PATTERN.search(field["type"]) and not NESTED_TYPE_PATTERN.match(field["type"])
+        ]
+    
+    @staticmethod
+    def sample_cardinality(parquet_file, sample_rows, columns=None, batch_size=65536):
+        """Estimate per-column cardinality from the first sample_rows rows
+        
+        Only the row groups needed to cover the sample are read, with column
+        projection, through the batch reader. Distinct values are counted with
+        a HyperLogLog sketch per column, so memory is bounded by the batch size
+        and the (fixed) sketch size regardless of file size.
+        
+        Returns:
+            Dict of column name -> {"sampled_rows", "sampled_non_null", "sampled_distinct"}
+        """
+        if not isinstance(parquet_file, pq.ParquetFile):
+            parquet_file = pq.ParquetFile(parquet_file)
+        if columns is None:
+            columns = [field.name for field in parquet_file.schema_arrow if not pa.types.is_nested(field.type)]
+        if not columns:
+            return {}
+        
+        sketches = {column: HyperLogLog() for column in columns}
+        non_null = dict.fromkeys(columns, 0)
+        rows_read = SchemaExtractor._sample_sketches(parquet_file, sample_rows, columns, sketches, non_null, batch_size)
+        
+        return {
+            column: {
+                "sampled_rows": rows_read,
+                "sampled_non_null": non_null[column],
+                "sampled_distinct": min(sketches[column].estimate(), non_null[column])
+            }
+            for column in columns
+        }
+    
+    @staticmethod
+    def _sample_sketches(parquet_file, sample_rows, columns, sketches, non_null, batch_size=65536):
+        """Feed up to sample_rows rows of a file into per-column sketches
+        
+        Returns:
+            Number of rows read
+        """
+        if not columns or sample_rows <= 0:
+            return 0
+        metadata = parquet_file.metadata
+        
+        # Row groups needed to cover the sample
+        row_groups = []
+        covered = 0
+        for row_group_index in range(metadata.num_row_groups):
+            if covered >= sample_rows:
+                break
+            row_groups.append(row_group_index)
+            covered += metadata.row_group(row_group_index).num_rows
+        
+        rows_read = 0
+        batches = parquet_file.iter_batches(
+            batch_size=min(batch_size, sample_rows),
+            row_groups=row_groups,
+            columns=columns
+        )
+        for batch in batches:
+            if rows_read + batch.num_rows > sample_rows:
+                batch = batch.slice(0, sample_rows - rows_read)
+            rows_read += batch.num_rows
+            
+            for column in columns:
+                array = batch.column(column)
+                non_null[column] += len(array) - array.null_count
+                # Deduplicate within the batch before hashing each value
+                sketches[column].update(value for value in pc.unique(array).to_pylist() if value is not None)
+            
+            if rows_read >= sample_rows:
+                break
+        
+        return rows_read
+    
+    @staticmethod
+    def estimated_cardinality(field):
+        """Best available estimate of a field's distinct values, or None
+        
+        Uses the footer distinct count when present, then a sampled estimate,
+        then the value range of an integer column (an upper bound).
+        """
+        stats = field.get("stats") or {}
+        if stats.get("distinct_count") is not None:
+            return stats["distinct_count"]
+        if stats.get("sampled_distinct") is not None:
+            return stats["sampled_distinct"]
+        
+        if INTEGER_TYPE_PATTERN.search(field.get("type", "")):
+            low, high = stats.get("min"), stats.get("max")
+            if isinstance(low, int) and isinstance(high, int):
+                return high - low + 1
+        
+        return None
+    
+    @staticmethod
+    def is_categorical_number(field):
+        """Whether a numeric field is an identifier rather than a quantity
+        
+        Integer columns named like IDs or codes whose profiled cardinality is
+        low are dimensions; summing them is meaningless.
+        """
+        if not INTEGER_TYPE_PATTERN.search(field.get("type", "")):
+            return False
+        if not ID_COLUMN_PATTERN.search(field.get("name", "")):
+            return False
+        
+        cardinality = SchemaExtractor.estimated_cardinality(field)
+        return cardinality is not None and cardinality <= LOW_CARDINALITY_MAX
+    
+    @staticmethod
+    def is_near_unique(field):
+        """Whether a sampled field has (almost) one distinct value per row
+        
+        Such columns (row IDs, UUIDs, free text) make useless dimensions.
+        """
+        stats = field.get("stats") or {}
+        non_null = stats.get("sampled_non_null")
+        distinct = stats.get("sampled_distinct")
+        if not non_null or distinct is None or non_null < NEAR_UNIQUE_MIN_ROWS:
+            return False
+        return distinct >= NEAR_UNIQUE_RATIO * non_null
+    
     @staticmethod
     def guess_timeseries_column(fields):
         """Guess which column is the timeseries column"""
@@ -72,9 +630,19 @@ class SchemaExtractor:
         for field in fields:
             field_type = field.get("type", "").lower()
             
-            # Check if field type is numeric
-            if numeric_pattern.search(field_type):
-                measure_fields.append(field)
+            # Partition keys (year=2024) are never summed
+            if field.get("partition"):
+                continue
+            
+            # Check if field type is numeric, leaving profiled ID columns as dimensions
+            if not numeric_pattern.search(field_type) or SchemaExtractor.is_categorical_number(field):
+                continue
+            
+            # Near-unique integer IDs are neither measures nor dimensions
+            if ID_COLUMN_PATTERN.search(field.get("name", "")) and SchemaExtractor.is_near_unique(field):
+                continue
+            
+            measure_fields.append(field)
         
         return measure_fields
     
@@ -93,6 +661,10 @@ class SchemaExtractor:
             if field_name in measure_names or field_name == timeseries_column:
                 continue
             
+            # Drop sampled columns with roughly one value per row
+            if SchemaExtractor.is_near_unique(field):
+                continue
+            
             dimension_fields.append(field)
         
         return dimension_fields
@@ -150,84 +722,165 @@ class SchemaExtractor:
         
         # Output to file if specified
         if output_file:
-            try:
-                with open(output_file, 'w') as file:
-                    # Generate header
-                    header = "# Metrics view YAML - Auto-generated from data source\n"
-                    header += "# Reference documentation: https://docs.rilldata.com/reference/project-files/dashboards\n\n"
-                    
-                    file.write(header)
-                    json.dump(metrics_yaml, file, indent=2)
-                print(f"Metrics YAML file generated: {output_file}")
-            except Exception as e:
-                print(f"Error writing metrics YAML file: {e}")
-                return metrics_yaml
+            SchemaExtractor.write_metrics_yaml(metrics_yaml, output_file)
         
         return metrics_yaml
     
     @staticmethod
-    def generate_metrics_yaml_from_parquet(parquet_file, output_file=None):
-        """Generate a metrics YAML file from a Parquet file"""
-        schema_info = SchemaExtractor.extract_from_parquet(parquet_file)
+    def write_metrics_yaml(metrics_yaml, output_file):
+        """Write a generated metrics view to output_file"""
+        try:
+            # Generate header
+            header = "# Metrics view YAML - Auto-generated from data source\n"
+            header += "# Reference documentation: https://docs.rilldata.com/reference/project-files/dashboards\n\n"
+            
+            if write_view(output_file, metrics_yaml, header):
+                print(f"Metrics YAML file generated: {output_file}")
+            else:
+                print(f"Metrics YAML file unchanged: {output_file}")
+            return True
+        except Exception as e:
+            print(f"Error writing metrics YAML file: {e}")
+            return False
+    
+    @staticmethod
+    def generate_metrics_yaml_from_parquet(parquet_file, output_file=None, profile=False, sample_rows=None, cache=None):
+        """Generate a metrics YAML file from a Parquet file, directory or glob
+        
+        With a SchemaCache, a single file whose schema fingerprint was seen
+        before reuses the stored metrics view: only the footer schema is read
+        and no columns are guessed. Profiled or sampled runs and datasets
+        depend on more than the schema, so they always bypass the cache.
+        """
+        if cache is not None and not (profile or sample_rows) and not SchemaExtractor.is_parquet_dataset(parquet_file):
+            try:
+                fingerprint = schema_fingerprint(pq.read_schema(parquet_file))
+            except Exception as e:
+                print(f"Error reading schema from Parquet file: {e}")
+                return None
+            
+            metrics_yaml = cache.get(fingerprint)
+            if metrics_yaml is None:
+                schema_info = SchemaExtractor.extract_from_parquet(parquet_file)
+                if not schema_info:
+                    return None
+                metrics_yaml = SchemaExtractor.generate_metrics_yaml_from_schema(schema_info)
+                cache.put(fingerprint, metrics_yaml)
+            
+            if output_file:
+                SchemaExtractor.write_metrics_yaml(metrics_yaml, output_file)
+            return metrics_yaml
+        
+        schema_info = SchemaExtractor.extract_from_parquet(parquet_file, profile, sample_rows)
         if schema_info:
             return SchemaExtractor.generate_metrics_yaml_from_schema(schema_info, output_file)
         return None
     
     @staticmethod
-    def update_existing_yaml(existing_file, schema_info, output_file=None):
-        """Update an existing YAML file with schema information"""
+    def plan_yaml_update(existing_yaml, schema_info):
+        """Work out which generated dimensions and measures a file is missing
+        
+        A generated entry is new when neither its name (case-insensitive) nor
+        its column (for dimensions) or normalized expression (for measures) is
+        already used.
+        
+        Returns:
+            (new_dimensions, new_measures)
+        """
+        new_yaml = SchemaExtractor.generate_metrics_yaml_from_schema(schema_info)
+        view = MetricsView.from_dict(existing_yaml)
+        
+        # The view's indexes grow as entries are added, so generated
+        # entries are also deduplicated against each other
+        new_dimensions = [dim for dim in new_yaml.get("dimensions", []) if view.add_dimension(dim)]
+        new_measures = [measure for measure in new_yaml.get("measures", []) if view.add_measure(measure)]
+        
+        return new_dimensions, new_measures
+    
+    @staticmethod
+    def render_yaml_update(text, updated_yaml, new_dimensions, new_measures):
+        """Apply new entries to a file's text, touching as little of it as possible
+        
+        Block-style YAML gets the entries appended in place. Legacy JSON output
+        and layouts that can't be edited in place are re-emitted whole, after
+        the original comment header.
+        """
+        match = yaml_io.FIRST_CONTENT_LINE.search(text)
+        header = text[:match.start()] if match else text
+        
+        if text[len(header):].lstrip().startswith("{"):
+            return header + json.dumps(updated_yaml, indent=2)
+        
+        new_text = yaml_io.append_sequence_items(text, "dimensions", new_dimensions)
+        if new_text is not None:
+            new_text = yaml_io.append_sequence_items(new_text, "measures", new_measures)
+        
+        # Only trust the in-place edit if it parses back to the intended data
+        if new_text is not None and yaml_io.safe_load(new_text) == updated_yaml:
+            return new_text
+        return header + yaml_io.dump(updated_yaml)
+    
+    @staticmethod
+    def update_existing_yaml_file(existing_file, schema_info, output_file=None):
+        """Add entries for new schema columns to a metrics YAML file
+        
+        Existing entries, their order, comments and formatting are preserved,
+        apart from a recorded content hash, which is updated to match. Nothing
+        is written when the output would be identical to what is already on
+        disk, so file watchers don't see no-op updates.
+        
+        Returns:
+            Dict with "data" (the updated metrics view), "dimensions_added",
+            "measures_added" and "written", or None on error
+        """
         try:
-            # Load existing YAML
             with open(existing_file, 'r') as file:
-                # Skip comments
-                yaml_content = ""
-                for line in file:
-                    if not line.strip().startswith('#'):
-                        yaml_content += line
-                
-                # Parse YAML content
-                existing_yaml = json.loads(yaml_content)
-            
-            # Generate new YAML from schema
-            new_yaml = SchemaExtractor.generate_metrics_yaml_from_schema(schema_info)
-            
-            # Compare and update
-            updated_yaml = existing_yaml.copy()
-            
-            # Update dimensions
-            existing_dimensions = {dim.get("name"): dim for dim in existing_yaml.get("dimensions", [])}
-            for dim in new_yaml.get("dimensions", []):
-                dim_name = dim.get("name")
-                if dim_name not in existing_dimensions:
-                    updated_yaml["dimensions"].append(dim)
-            
-            # Update measures
-            existing_measures = {measure.get("name"): measure for measure in existing_yaml.get("measures", [])}
-            for measure in new_yaml.get("measures", []):
-                measure_name = measure.get("name")
-                if measure_name not in existing_measures:
-                    updated_yaml["measures"].append(measure)
-            
-            # Output to file if specified
-            if output_file:
+                text = file.read()
+            # Legacy JSON output parses as YAML too
+            existing_yaml = yaml_io.safe_load(text) or {}
+            
+            new_dimensions, new_measures = SchemaExtractor.plan_yaml_update(existing_yaml, schema_info)
+            
+            # A section the file doesn't have is only added if it gains entries
+            updated_yaml = dict(existing_yaml)
+            for key, new_items in (("dimensions", new_dimensions), ("measures", new_measures)):
+                if key in existing_yaml or new_items:
+                    updated_yaml[key] = list(existing_yaml.get(key) or []) + new_items
+            
+            result = {
+                "data": updated_yaml,
+                "dimensions_added": [dim["name"] for dim in new_dimensions],
+                "measures_added": [measure["name"] for measure in new_measures],
+                "written": False
+            }
+            if not output_file:
+                return result
+            
+            if new_dimensions or new_measures:
+                new_text = SchemaExtractor.render_yaml_update(text, updated_yaml, new_dimensions, new_measures)
+                new_text = restamp_text(new_text, updated_yaml)
+            else:
+                new_text = text
+            
+            if os.path.abspath(output_file) != os.path.abspath(existing_file) or new_text != text:
                 try:
-                    with open(output_file, 'w') as file:
-                        # Generate header
-                        header = "# Metrics view YAML - Updated with schema information\n"
-                        header += "# Reference documentation: https://docs.rilldata.com/reference/project-files/dashboards\n\n"
-                        
-                        file.write(header)
-                        json.dump(updated_yaml, file, indent=2)
-                    print(f"Updated metrics YAML file: {output_file}")
+                    result["written"] = write_text(output_file, new_text)
                 except Exception as e:
+                    # Callers must not mistake a failed write for "unchanged"
                     print(f"Error writing updated metrics YAML file: {e}")
-                    return updated_yaml
+                    return None
             
-            return updated_yaml
+            return result
             
         except Exception as e:
             print(f"Error updating existing YAML file: {e}")
             return None
+    
+    @staticmethod
+    def update_existing_yaml(existing_file, schema_info, output_file=None):
+        """Update an existing YAML file with schema information"""
+        result = SchemaExtractor.update_existing_yaml_file(existing_file, schema_info, output_file)
+        return result["data"] if result else None
 
 if __name__ == "__main__":
     import sys
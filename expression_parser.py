@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tokenizer for measure expressions
+
+Splits a SQL measure expression such as
+    SUM(clicks) / NULLIF(SUM("impressions"), 0) * 100
+into tokens in a single left-to-right pass and classifies identifiers as
+columns, functions or keywords. String and numeric literals are kept apart so
+their contents are never mistaken for column names.
+
+Results are cached by expression text, since the same expressions recur
+across thousands of metrics files.
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+Token = namedtuple("Token", ["kind", "value"])
+ParsedExpression = namedtuple("ParsedExpression", ["columns", "functions", "literals"])
+
+# Token kinds
+IDENTIFIER = "identifier"
+QUOTED_IDENTIFIER = "quoted_identifier"
+STRING = "string"
+NUMBER = "number"
+OPERATOR = "operator"
+PUNCTUATION = "punctuation"
+
+# Reserved words that are never column references
+KEYWORDS = frozenset([
+    "select", "from", "where", "group", "order", "by", "having", "if", "case",
+    "when", "then", "else", "end", "and", "or", "not", "null", "true", "false",
+    "distinct", "as", "in", "between", "is", "like", "ilike", "filter", "over",
+    "partition", "asc", "desc", "nulls", "first", "last", "interval", "exists",
+    "all", "any", "cast"
+])
+
+# Keywords that may be followed by "(" without being function calls
+NON_FUNCTION_KEYWORDS = frozenset([
+    "and", "or", "not", "in", "exists", "filter", "over", "as", "when", "then",
+    "else", "is", "between", "like", "ilike", "any", "all"
+])
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<quoted_identifier>"(?:[^"]|"")*")
+  | (?P<string>'(?:[^']|'')*')
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<identifier>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<operator>::|<=|>=|<>|!=|\|\||[-+*/%<>=])
+  | (?P<punctuation>[(),.\[\]])
+  | (?P<other>.)
+""", re.VERBOSE | re.DOTALL)
+
+def expression_text(expression):
+    """An expression as text; YAML parses expressions like `1` as numbers"""
+    return "" if expression is None else str(expression)
+
+def tokenize(expression):
+    """Split an expression into a tuple of Tokens (whitespace dropped)"""
+    # Coerced before the cache so 1 and "1" share an entry
+    return _tokenize(expression_text(expression))
+
+@lru_cache(maxsize=8192)
+def _tokenize(expression):
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(expression):
+        kind = match.lastgroup
+        if kind == "space":
+            continue
+        value = match.group()
+        if kind == QUOTED_IDENTIFIER:
+            value = value[1:-1].replace('""', '"')
+        elif kind == "other":
+            kind = PUNCTUATION
+        tokens.append(Token(kind, value))
+    return tuple(tokens)
+
+def parse_expression(expression):
+    """Classify the identifiers and literals in an expression
+
+    Returns:
+        ParsedExpression of (columns, functions, literals). Columns and
+        functions are frozensets; function names are lower-cased. Literals
+        are a tuple in order of appearance.
+    """
+    return _parse_expression(expression_text(expression))
+
+@lru_cache(maxsize=8192)
+def _parse_expression(expression):
+    tokens = _tokenize(expression)
+    columns = set()
+    functions = set()
+    literals = []
+
+    for i, token in enumerate(tokens):
+        previous = tokens[i - 1] if i > 0 else None
+        following = tokens[i + 1] if i + 1 < len(tokens) else None
+
+        if token.kind in (STRING, NUMBER):
+            literals.append(token.value)
+            continue
+        if token.kind not in (IDENTIFIER, QUOTED_IDENTIFIER):
+            continue
+
+        # table.column: only the last part of a dotted name is the column
+        if following is not None and following.value == ".":
+            continue
+
+        if token.kind == QUOTED_IDENTIFIER:
+            columns.add(token.value)
+            continue
+
+        lowered = token.value.lower()
+
+        if following is not None and following.value == "(" and lowered not in NON_FUNCTION_KEYWORDS:
+            functions.add(lowered)
+        elif lowered in KEYWORDS:
+            if lowered in ("null", "true", "false"):
+                literals.append(lowered)
+        elif previous is not None and (previous.value == "::" or previous.value.lower() == "as"):
+            # Type names in casts and aliases
+            continue
+        else:
+            columns.add(token.value)
+
+    return ParsedExpression(frozenset(columns), frozenset(functions), tuple(literals))
+
+def extract_columns(expression):
+    """Return the set of column names referenced by an expression"""
+    return set(parse_expression(expression).columns)
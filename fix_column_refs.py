@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
-import yaml
+import yaml_io
 import os
 import re
 from datetime import datetime
+from expression_parser import extract_columns
+from view_writer import write_view, write_counts
 
 def extract_column_mappings(yaml_data):
     """Extract a mapping of column names from dimensions"""
@@ -73,19 +75,7 @@ def check_remaining_issues(yaml_data, available_columns):
             name = measure["name"]
             
             # Look for column references
-            quoted_cols = re.findall(r'"([^"]+)"', expression)
-            unquoted_cols = []
-            for match in re.finditer(r'(?<!\.)(?<!\w)([a-zA-Z_][a-zA-Z0-9_]*)(?!\s*\()', expression):
-                # Skip SQL keywords and function names
-                if match.group(1).lower() not in ['select', 'from', 'where', 'group', 'order', 'by', 
-                                               'having', 'if', 'case', 'when', 'then', 'else', 
-                                               'end', 'and', 'or', 'not', 'null', 'true', 'false',
-                                               'sum', 'count', 'avg', 'min', 'max', 'stddev', 
-                                               'distinct', 'as', 'in', 'between', 'is', 'like']:
-                    unquoted_cols.append(match.group(1))
-            
-            # Check if all columns exist
-            all_cols = set(quoted_cols + unquoted_cols)
+            all_cols = extract_columns(expression)
             missing_cols = [col for col in all_cols if col not in available_cols]
             
             if missing_cols:
@@ -103,8 +93,7 @@ def fix_yaml_file(input_file, output_file=None, additional_columns=None):
         output_file = input_file
         
     # Load the YAML file
-    with open(input_file, 'r') as f:
-        yaml_data = yaml.safe_load(f)
+    yaml_data = yaml_io.load_file(input_file)
     
     # Extract column mappings
     column_map = extract_column_mappings(yaml_data)
@@ -134,9 +123,7 @@ def fix_yaml_file(input_file, output_file=None, additional_columns=None):
     header += "\n"
     
     # Write the output file
-    with open(output_file, 'w') as f:
-        f.write(header)
-        yaml.dump(fixed_yaml, f, sort_keys=False, default_flow_style=False)
+    write_view(output_file, fixed_yaml, header)
     
     return output_file, measures_updated, issues
 
@@ -156,6 +143,8 @@ if __name__ == "__main__":
     result_file, count, issues = fix_yaml_file(input_file, output_file, additional_columns)
     
     print(f"Updated {count} measure(s) in {result_file}")
+    counts = write_counts()
+    print(f"Files: {counts['written']} written, {counts['unchanged']} unchanged")
     if issues:
         print(f"WARNING: {len(issues)} measure(s) still have issues")
         for issue in issues:
@@ -12,9 +12,10 @@ Usage:
 
 If no output file is specified, the input file will be modified in place.
 """
-import yaml
+import yaml_io
 import os
 import re
+from view_writer import write_view, write_counts
 from datetime import datetime
 
 def fix_yaml_file(input_file, output_file=None):
@@ -23,8 +24,7 @@ def fix_yaml_file(input_file, output_file=None):
         output_file = input_file
         
     # Load the YAML file
-    with open(input_file, 'r') as f:
-        yaml_data = yaml.safe_load(f)
+    yaml_data = yaml_io.load_file(input_file)
     
     # Get measures
     measures = yaml_data.get("measures", [])
@@ -59,9 +59,7 @@ def fix_yaml_file(input_file, output_file=None):
     header += "\n"
     
     # Write the output file
-    with open(output_file, 'w') as f:
-        f.write(header)
-        yaml.dump(yaml_data, f, sort_keys=False, default_flow_style=False)
+    write_view(output_file, yaml_data, header)
     
     return output_file, measures_updated
 
@@ -77,4 +75,6 @@ if __name__ == "__main__":
     
     result_file, count = fix_yaml_file(input_file, output_file)
     
-    print(f"Updated {count} measure(s) in {result_file}") 
\ No newline at end of file
+    print(f"Updated {count} measure(s) in {result_file}")
+    counts = write_counts()
+    print(f"Files: {counts['written']} written, {counts['unchanged']} unchanged") 
\ No newline at end of file
@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
 import os
-import yaml
+import json
+import yaml_io
 import argparse
 import glob
+import time
 from datetime import datetime
 import shutil
 import click
+from template_manager import shared_template_cache
+from view_writer import write_view
 
 # Base directory for the metrics repo - DO NOT modify this directory
 METRICS_DIR = "/Users/jasonrush/SWYM/metrics"
@@ -17,50 +21,161 @@ TEMPLATE_DIR = os.path.expanduser("~/yaml-generator/templates")
 DSP_TYPES = ["TTD", "DV360", "STACKADAPT", "YAHOO"]
 MEDIA_TYPES = ["DISPLAY", "VIDEO", "CTV", "NATIVE"]
 
-def find_example_files():
-    """Find example files from the metrics directory for each DSP and media type"""
-    examples = {}
+# Persistent index of example files, refreshed incrementally by mtime/size
+EXAMPLE_INDEX_PATH = os.path.expanduser("~/yaml-generator/example_index.json")
+EXAMPLE_INDEX_VERSION = 1
+
+def detect_dsp_and_media_types(yaml_file, content=None):
+    """Return the DSPs and media types mentioned in a file's name or content"""
+    if content is None:
+        with open(yaml_file, 'r') as file:
+            content = file.read()
     
-    # Find all yaml files
-    yaml_files = glob.glob(f"{METRICS_DIR}/**/*metrics.yaml", recursive=True)
+    # Filename and content are searched together; the newline keeps
+    # a match from spanning the two
+    haystack = os.path.basename(yaml_file).upper() + "\n" + content.upper()
+    
+    dsps = [dsp for dsp in DSP_TYPES if dsp in haystack]
+    media_types = [media_type for media_type in MEDIA_TYPES if media_type in haystack]
+    return dsps, media_types
+
+def index_example_files(yaml_files):
+    """Build a DSP -> media type -> files index, reading each file once"""
+    examples = {dsp: {media_type: [] for media_type in MEDIA_TYPES} for dsp in DSP_TYPES}
+    
+    for yaml_file in yaml_files:
+        dsps, media_types = detect_dsp_and_media_types(yaml_file)
+        for dsp in dsps:
+            for media_type in media_types:
+                examples[dsp][media_type].append(yaml_file)
+    
+    return examples
+
+class ExampleIndex:
+    """On-disk index of example files keyed by path
     
-    # Categorize files by DSP and media type
-    for dsp in DSP_TYPES:
-        examples[dsp] = {}
-        for media_type in MEDIA_TYPES:
-            examples[dsp][media_type] = []
+    Each entry records the file's mtime and size along with the detected DSPs,
+    media types and dimension/measure counts. refresh() only re-reads files
+    that are new or whose mtime or size changed.
+    """
+    
+    def __init__(self, index_path=None):
+        """Load the index from disk, starting empty if it is missing or stale"""
+        self.index_path = index_path or EXAMPLE_INDEX_PATH
+        self.entries = {}
+        
+        try:
+            with open(self.index_path, 'r') as file:
+                data = json.load(file)
+            if data.get("version") == EXAMPLE_INDEX_VERSION:
+                self.entries = data.get("files", {})
+        except (OSError, ValueError):
+            pass
+    
+    @staticmethod
+    def scan_file(yaml_file, stat_result):
+        """Read a single example file and build its index entry"""
+        with open(yaml_file, 'r') as file:
+            content = file.read()
+        
+        dsps, media_types = detect_dsp_and_media_types(yaml_file, content)
+        
+        try:
+            data = yaml_io.safe_load(content)
+        except yaml_io.YAMLError:
+            data = None
+        if not isinstance(data, dict):
+            data = {}
+        
+        return {
+            "mtime": stat_result.st_mtime_ns,
+            "size": stat_result.st_size,
+            "dsps": dsps,
+            "media_types": media_types,
+            "dimensions": len(data.get("dimensions") or []),
+            "measures": len(data.get("measures") or [])
+        }
+    
+    def refresh(self, yaml_files):
+        """Bring the index in line with yaml_files
+        
+        Returns:
+            Dict with counts of added, changed, removed and unchanged files
+        """
+        stats = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0}
+        entries = {}
+        
+        for yaml_file in yaml_files:
+            try:
+                stat_result = os.stat(yaml_file)
+            except OSError:
+                continue
+            
+            entry = self.entries.get(yaml_file)
+            if entry and entry["mtime"] == stat_result.st_mtime_ns and entry["size"] == stat_result.st_size:
+                stats["unchanged"] += 1
+            else:
+                try:
+                    new_entry = self.scan_file(yaml_file, stat_result)
+                except (OSError, UnicodeDecodeError) as e:
+                    print(f"Error indexing {yaml_file}: {e}")
+                    continue
+                stats["changed" if entry else "added"] += 1
+                entry = new_entry
             
-            # Find files matching both DSP and media type
-            for yaml_file in yaml_files:
-                file_content = open(yaml_file, 'r').read().upper()
-                filename = os.path.basename(yaml_file).upper()
-                
-                if (dsp in filename or dsp in file_content) and (media_type in filename or media_type in file_content):
+            entries[yaml_file] = entry
+        
+        stats["removed"] = len(set(self.entries) - set(entries))
+        self.entries = entries
+        return stats
+    
+    def save(self):
+        """Write the index to disk atomically"""
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump({"version": EXAMPLE_INDEX_VERSION, "files": self.entries}, file, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+    
+    def examples(self):
+        """Return the DSP -> media type -> files mapping for the indexed files"""
+        examples = {dsp: {media_type: [] for media_type in MEDIA_TYPES} for dsp in DSP_TYPES}
+        
+        for yaml_file, entry in self.entries.items():
+            for dsp in entry["dsps"]:
+                for media_type in entry["media_types"]:
                     examples[dsp][media_type].append(yaml_file)
+        
+        return examples
+
+def find_example_files(use_index=True):
+    """Find example files from the metrics directory for each DSP and media type"""
+    # Find all yaml files
+    yaml_files = glob.glob(f"{METRICS_DIR}/**/*metrics.yaml", recursive=True)
     
-    return examples
+    if not use_index:
+        # Categorize files by DSP and media type in a single pass
+        return index_example_files(yaml_files)
+    
+    # Only re-read files that were added or changed since the last run
+    index = ExampleIndex()
+    stats = index.refresh(yaml_files)
+    if stats["added"] or stats["changed"] or stats["removed"]:
+        index.save()
+    
+    return index.examples()
 
 def load_yaml_file(file_path):
-    """Load a YAML file, handling comments"""
+    """Load a YAML file, returning None if it is missing or malformed"""
     if not os.path.exists(file_path):
         return None
         
-    with open(file_path, 'r') as file:
-        # Skip comments at the top of the file
-        yaml_content = ""
-        in_comment_block = False
-        
-        for line in file:
-            if line.strip().startswith('#'):
-                continue
-            yaml_content += line
-        
-        # Load the YAML content
-        try:
-            return yaml.safe_load(yaml_content)
-        except Exception as e:
-            print(f"Error loading {file_path}: {e}")
-            return None
+    # Load the YAML content; the parser skips comments itself
+    try:
+        return yaml_io.load_file(file_path)
+    except Exception as e:
+        print(f"Error loading {file_path}: {e}")
+        return None
 
 def extract_template_from_file(file_path, dsp, media_type):
     """Extract a template from an example file"""
@@ -81,7 +196,7 @@ def extract_template_from_file(file_path, dsp, media_type):
     
     return template
 
-def create_template(dsp, media_type, examples):
+def create_template(dsp, media_type, examples, generated_on=None):
     """Create a template for a specific DSP and media type"""
     # Use the best matching example file
     template_data = None
@@ -118,7 +233,7 @@ def create_template(dsp, media_type, examples):
     header = "# Metrics view YAML - TEMPLATE\n"
     header += f"# DSP: {dsp}, Media Type: {media_type}\n"
     header += "# Reference documentation: https://docs.rilldata.com/reference/project-files/dashboards\n"
-    header += f"# Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+    header += f"# Generated on {generated_on or datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
     
     if example_file:
         header += f"# Based on example file: {os.path.basename(example_file)}\n\n"
@@ -126,35 +241,59 @@ def create_template(dsp, media_type, examples):
         header += "# No suitable example file found, using basic template\n\n"
     
     # Write the YAML file
-    with open(output_file, 'w') as file:
-        file.write(header)
-        yaml.dump(template_data, file, sort_keys=False, default_flow_style=False)
+    write_view(output_file, template_data, header)
     
     print(f"Created template: {output_file}")
     return output_file
 
-def generate_all_templates():
-    """Generate templates for all combinations of DSP and media type"""
+def _timed_create_template(dsp, media_type, examples, generated_on):
+    """Create one template and report how long it took (process pool worker)"""
+    start = time.perf_counter()
+    template_file = create_template(dsp, media_type, examples, generated_on)
+    return {
+        "dsp": dsp,
+        "media_type": media_type,
+        "template_file": template_file,
+        "seconds": time.perf_counter() - start
+    }
+
+def generate_templates(jobs=1):
+    """Generate templates for all DSP and media type combinations
+    
+    Args:
+        jobs: Number of worker processes. Output files are identical whatever
+            the worker count, since the header timestamp is fixed up front.
+            
+    Returns:
+        List of per-combination results (dsp, media_type, template_file, seconds)
+        in DSP_TYPES x MEDIA_TYPES order
+    """
     example_files = find_example_files()
+    generated_on = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
-    created_templates = []
-    for dsp in DSP_TYPES:
-        for media_type in MEDIA_TYPES:
-            template_file = create_template(dsp, media_type, example_files)
-            if template_file:
-                created_templates.append(template_file)
+    # Each worker only needs the examples for its own DSP
+    tasks = [
+        (dsp, media_type, {dsp: example_files.get(dsp, {})}, generated_on)
+        for dsp in DSP_TYPES
+        for media_type in MEDIA_TYPES
+    ]
     
-    return created_templates
+    if jobs and jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(_timed_create_template, *task) for task in tasks]
+            return [future.result() for future in futures]
+    
+    return [_timed_create_template(*task) for task in tasks]
 
-def create_metrics_yaml(
-    client_name, 
-    brand_name, 
-    media_type, 
-    platform, 
-    template_path=None,
-    output_path=None
-):
-    """Create a new metrics YAML file based on templates"""
+def generate_all_templates(jobs=1):
+    """Generate templates for all combinations of DSP and media type"""
+    results = generate_templates(jobs)
+    return [result["template_file"] for result in results if result["template_file"]]
+
+def normalize_platform_and_media_type(platform, media_type):
+    """Map free-form platform and media type names to DSP_TYPES/MEDIA_TYPES keys"""
     # Normalize inputs
     platform_upper = platform.upper()
     media_type_upper = media_type.upper()
@@ -183,12 +322,40 @@ def create_metrics_yaml(
     else:
         media_type_key = "DISPLAY"  # Default
     
+    return dsp_key, media_type_key
+
+def default_template_path(dsp_key, media_type_key):
+    """Path of the generated template for a DSP and media type"""
+    return os.path.join(TEMPLATE_DIR, dsp_key.lower(), f"{media_type_key.lower()}_template.yaml")
+
+def create_metrics_yaml_file(
+    client_name, 
+    brand_name, 
+    media_type, 
+    platform, 
+    template_path=None,
+    output_path=None,
+    template_cache=None
+):
+    """Create a new metrics YAML file based on templates
+    
+    Templates are compiled through template_cache (a TemplateCache, by
+    default the process-wide one shared with TemplateManager), which resolves
+    `extends:` chains and only re-reads a template when it or one of its base
+    templates changed on disk. An existing output file whose recorded content
+    hash matches the new view is left untouched.
+    
+    Returns:
+        Dict with the output "path" and whether it was "written", or None
+    """
+    dsp_key, media_type_key = normalize_platform_and_media_type(platform, media_type)
+    
     # If template path is provided, use it directly
     if template_path and os.path.exists(template_path):
         pass
     else:
         # Find the appropriate template
-        template_path = os.path.join(TEMPLATE_DIR, dsp_key.lower(), f"{media_type_key.lower()}_template.yaml")
+        template_path = default_template_path(dsp_key, media_type_key)
         
         # If template doesn't exist, try to generate it
         if not os.path.exists(template_path):
@@ -201,7 +368,13 @@ def create_metrics_yaml(
             return None
     
     # Load the template
-    template_data = load_yaml_file(template_path)
+    template_cache = template_cache or shared_template_cache()
+    try:
+        template_data = template_cache.load(template_path)
+        template_cache.save()
+    except Exception as e:
+        print(f"Error loading {template_path}: {e}")
+        template_data = None
     if not template_data:
         print(f"Error loading template: {template_path}")
         return None
@@ -223,12 +396,35 @@ def create_metrics_yaml(
     header += f"# Based on template: {os.path.basename(template_path)}\n\n"
     
     # Write the output file
-    with open(output_path, 'w') as file:
-        file.write(header)
-        yaml.dump(template_data, file, sort_keys=False, default_flow_style=False)
+    written = write_view(output_path, template_data, header)
+    return {"path": output_path, "written": written}
+
+def create_metrics_yaml(
+    client_name, 
+    brand_name, 
+    media_type, 
+    platform, 
+    template_path=None,
+    output_path=None,
+    template_cache=None
+):
+    """Create a new metrics YAML file based on templates (see create_metrics_yaml_file)
     
-    print(f"Created metrics YAML file: {output_path}")
-    return output_path
+    Returns:
+        Path of the metrics YAML file, or None
+    """
+    result = create_metrics_yaml_file(
+        client_name, brand_name, media_type, platform,
+        template_path, output_path, template_cache
+    )
+    if not result:
+        return None
+    
+    if result["written"]:
+        print(f"Created metrics YAML file: {result['path']}")
+    else:
+        print(f"Metrics YAML file unchanged: {result['path']}")
+    return result["path"]
 
 def create_templates_command():
     """Create the template files for all DSP and media type combinations"""
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Fleet-wide catalog of measures keyed by normalized expression
+
+The same measure often appears under different names and labels across
+client files, e.g. CTR written as `SUM(clicks) / SUM(impressions) * 100` in
+one file and `sum("Clicks")/sum("Impressions")*100` in another. The catalog
+tokenizes every expression, normalizes whitespace, case and quoting, hashes
+the result and records which names and files use each expression.
+
+The catalog is saved as gzipped JSON so lookups don't need a repo-wide scan.
+"""
+import os
+import gzip
+import json
+import hashlib
+import tempfile
+from functools import lru_cache
+
+import yaml_io
+from expression_parser import tokenize, STRING
+
+CATALOG_PATH = os.path.expanduser("~/yaml-generator/measure_catalog.json.gz")
+CATALOG_VERSION = 1
+
+@lru_cache(maxsize=8192)
+def normalize_expression(expression):
+    """Canonical text for an expression: lower-cased, unquoted, single-spaced
+
+    String literals are left untouched since their case is significant.
+    """
+    # Quoted identifiers come back from the tokenizer without their quotes,
+    # so "Impressions" and impressions normalize to the same text
+    return " ".join(
+        token.value if token.kind == STRING else token.value.lower()
+        for token in tokenize(expression)
+    )
+
+def expression_hash(expression):
+    """Short stable hash of an expression's normalized form"""
+    return hashlib.sha1(normalize_expression(str(expression)).encode("utf-8")).hexdigest()[:16]
+
+class MeasureCatalog:
+    """Index of expression hash -> names, files and counts"""
+
+    def __init__(self):
+        # File paths are stored once and referenced by position
+        self.files = []
+        self.entries = {}
+        self._file_ids = {}
+
+    def _file_id(self, file_path):
+        if file_path not in self._file_ids:
+            self._file_ids[file_path] = len(self.files)
+            self.files.append(file_path)
+        return self._file_ids[file_path]
+
+    def add_measure(self, measure, file_path):
+        """Record one measure definition found in file_path"""
+        expression = measure.get("expression")
+        if expression is None or expression == "":
+            return None
+        # YAML turns bare numbers into ints and floats
+        expression = str(expression)
+
+        key = expression_hash(expression)
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = {
+                "expression": normalize_expression(expression),
+                "count": 0,
+                "names": {},
+                "files": []
+            }
+
+        entry["count"] += 1
+        name = str(measure.get("name") or "")
+        entry["names"][name] = entry["names"].get(name, 0) + 1
+
+        file_id = self._file_id(file_path)
+        if not entry["files"] or entry["files"][-1] != file_id:
+            entry["files"].append(file_id)
+        return key
+
+    def add_file(self, file_path):
+        """Record every measure in a metrics YAML file
+
+        Returns:
+            Number of measures recorded
+        """
+        data = yaml_io.load_file(file_path)
+        if not isinstance(data, dict):
+            return 0
+
+        added = 0
+        for measure in data.get("measures") or []:
+            if isinstance(measure, dict) and self.add_measure(measure, file_path):
+                added += 1
+        return added
+
+    @classmethod
+    def build(cls, file_paths):
+        """Build a catalog from metrics YAML files, skipping unreadable ones"""
+        catalog = cls()
+        for file_path in file_paths:
+            try:
+                catalog.add_file(file_path)
+            except (OSError, UnicodeDecodeError, yaml_io.YAMLError) as e:
+                print(f"Error reading {file_path}: {e}")
+        return catalog
+
+    def save(self, catalog_path=None):
+        """Write the catalog as compact gzipped JSON"""
+        catalog_path = catalog_path or CATALOG_PATH
+        directory = os.path.dirname(os.path.abspath(catalog_path))
+        os.makedirs(directory, exist_ok=True)
+        # A unique temporary file, so concurrent builds never write into each other's
+        raw = tempfile.NamedTemporaryFile(
+            dir=directory, prefix=f".{os.path.basename(catalog_path)}.", suffix=".tmp", delete=False
+        )
+        try:
+            with raw, gzip.open(raw, 'wt', encoding='utf-8') as file:
+                json.dump(
+                    {"version": CATALOG_VERSION, "files": self.files, "entries": self.entries},
+                    file, separators=(",", ":")
+                )
+            os.replace(raw.name, catalog_path)
+        except BaseException:
+            if os.path.exists(raw.name):
+                os.remove(raw.name)
+            raise
+        return catalog_path
+
+    @classmethod
+    def load(cls, catalog_path=None):
+        """Load a saved catalog, or None if it is missing or from another version"""
+        catalog_path = catalog_path or CATALOG_PATH
+        try:
+            with gzip.open(catalog_path, 'rt', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != CATALOG_VERSION:
+            return None
+
+        catalog = cls()
+        catalog.files = data["files"]
+        catalog.entries = data["entries"]
+        catalog._file_ids = {file_path: i for i, file_path in enumerate(catalog.files)}
+        return catalog
+
+    def find_by_expression(self, expression):
+        """Return (hash, entry) pairs for an expression, ignoring formatting differences"""
+        key = expression_hash(expression)
+        entry = self.entries.get(key)
+        return [(key, entry)] if entry else []
+
+    def find_by_name(self, text, matches=None):
+        """Return (hash, entry) pairs where a measure name contains text (case-insensitive)
+        
+        matches narrows the search to earlier results, e.g. from find_by_expression.
+        """
+        text = text.lower()
+        candidates = matches if matches is not None else self.entries.items()
+        return [
+            (key, entry) for key, entry in candidates
+            if any(text in name.lower() for name in entry["names"])
+        ]
+
+    def entry_files(self, entry):
+        """File paths that define an entry's expression"""
+        return [self.files[file_id] for file_id in entry["files"]]
+
+    def stats(self):
+        """Summary counts for the catalog"""
+        return {
+            "files": len(self.files),
+            "expressions": len(self.entries),
+            "measures": sum(entry["count"] for entry in self.entries.values())
+        }
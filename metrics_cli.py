@@ -1,15 +1,13 @@
 #!/usr/bin/env python3
 import os
 import sys
+import time
 import click
-import yaml
 import json
 
-# Import our modules
-from generate_metrics_yaml import create_metrics_yaml, generate_all_templates
-from validation import comprehensive_file_validation
-from template_manager import TemplateManager, initialize_presets, merge_metrics_files
-from data_source import SchemaExtractor
+# Our modules are imported inside each command so that a command only pays
+# for the dependencies it uses (pyarrow for Parquet, jsonschema for validation)
+from validation import DEFAULT_MAX_ERRORS
 
 @click.group()
 def cli():
@@ -27,6 +25,9 @@ def cli():
 @click.option('--validate/--no-validate', default=True, help='Validate the generated YAML file')
 def create_command(client, brand, media_type, platform, output, template, preset, validate):
     """Create a new metrics YAML file for a client dashboard."""
+    from generate_metrics_yaml import create_metrics_yaml_file
+    from template_manager import TemplateManager
+    from validation import comprehensive_file_validation
     
     # Use preset template if specified
     if preset:
@@ -38,10 +39,10 @@ def create_command(client, brand, media_type, platform, output, template, preset
             click.echo(f"Preset template '{preset}' not found. Available presets:")
             for p in manager.list_presets():
                 click.echo(f"  - {p.replace('.yaml', '')}")
-            return
+            sys.exit(1)
     
     # Create the metrics YAML file
-    output_path = create_metrics_yaml(
+    result = create_metrics_yaml_file(
         client_name=client,
         brand_name=brand,
         media_type=media_type,
@@ -50,11 +51,15 @@ def create_command(client, brand, media_type, platform, output, template, preset
         output_path=output
     )
     
-    if not output_path:
+    if not result:
         click.echo("Failed to create metrics YAML file.")
-        return
+        sys.exit(1)
     
-    click.echo(f"Created metrics YAML file: {output_path}")
+    output_path = result["path"]
+    if result["written"]:
+        click.echo(f"Created metrics YAML file: {output_path}")
+    else:
+        click.echo(f"Metrics YAML file unchanged: {output_path}")
     
     # Validate the generated file if requested
     if validate and output_path:
@@ -66,17 +71,68 @@ def create_command(client, brand, media_type, platform, output, template, preset
             for error in errors:
                 click.echo(f"  - {error}")
 
+@cli.command('create-batch')
+@click.argument('manifest', type=click.Path(exists=True))
+@click.option('--jobs', type=int, default=1, help='Number of worker processes')
+@click.option('--output-dir', help='Directory for the generated YAML files')
+@click.option('--report', help='Path for a JSON summary report')
+@click.option('--validate/--no-validate', default=True, help='Validate each generated YAML file')
+def create_batch_command(manifest, jobs, output_dir, report, validate):
+    """Create metrics YAML files for every row in MANIFEST.
+    
+    MANIFEST is a CSV, YAML or JSON lines file with client, brand, media_type
+    and platform columns, plus optional output, template and preset columns.
+    
+    Example:
+    metrics_cli.py create-batch agency_onboarding.csv --jobs 8 --output-dir out --report report.json
+    """
+    from batch_create import create_batch, write_report
+    
+    try:
+        summary = create_batch(manifest, jobs=jobs, output_dir=output_dir, validate=validate)
+    except (OSError, ValueError) as e:
+        click.echo(f"❌ Error reading manifest: {str(e)}")
+        sys.exit(1)
+    
+    for result in summary["rows"]:
+        label = " - ".join(str(result.get(key) or "?") for key in ("client", "brand", "media_type", "platform"))
+        if result["success"]:
+            click.echo(f"✅ Row {result['row']}: {label} -> {result['output']} ({result['seconds']:.3f}s)")
+        else:
+            click.echo(f"❌ Row {result['row']}: {label} ({result['seconds']:.3f}s)")
+            for error in result["errors"]:
+                click.echo(f"  - {error}")
+    
+    click.echo(f"Created {summary['succeeded']}/{summary['total']} metrics files in {summary['seconds']:.2f}s with {summary['jobs']} worker(s)")
+    click.echo(f"Files: {summary['written']} written, {summary['unchanged']} unchanged")
+    
+    if report:
+        write_report(summary, report)
+        click.echo(f"Report written to: {report}")
+    
+    if summary["failed"]:
+        sys.exit(1)
+
+def echo_write_counts():
+    """Print how many files this command wrote and left unchanged"""
+    from view_writer import write_counts
+    
+    counts = write_counts()
+    click.echo(f"Files: {counts['written']} written, {counts['unchanged']} unchanged")
+
 @cli.command('merge-measures')
 @click.argument('base_file', type=click.Path(exists=True))
-@click.argument('source_file', type=click.Path(exists=True))
+@click.argument('source_files', nargs=-1, required=True)
 @click.option('--output', help='Output path for the merged YAML file. If not provided, the base file will be updated.')
 @click.option('--validate/--no-validate', default=True, help='Validate the generated YAML file')
 @click.option('--check-columns/--no-check-columns', default=True, help='Check if columns exist in base dataset')
-def merge_measures_command(base_file, source_file, output, validate, check_columns):
-    """Merge measures from SOURCE_FILE into BASE_FILE.
+def merge_measures_command(base_file, source_files, output, validate, check_columns):
+    """Merge measures from one or more SOURCE_FILES into BASE_FILE.
     
-    This command takes measures defined in SOURCE_FILE and adds them to BASE_FILE,
-    avoiding duplicates. The resulting file can either replace BASE_FILE or be
+    This command takes measures defined in SOURCE_FILES and adds them to BASE_FILE,
+    avoiding duplicates. SOURCE_FILES may be paths or glob patterns (quote them
+    to stop the shell expanding them); sources are merged in order and the result
+    is written once. The resulting file can either replace BASE_FILE or be
     written to a new file specified by --output.
     
     By default, only measures referencing columns that exist in the base dataset
@@ -84,17 +140,40 @@ def merge_measures_command(base_file, source_file, output, validate, check_colum
     
     Example:
     metrics_cli.py merge-measures client_a.yaml client_b.yaml --output merged.yaml
+    metrics_cli.py merge-measures house.yaml "clients/*_metrics.yaml" --output merged.yaml
     """
-    click.echo(f"Merging measures from {source_file} into {base_file}...")
+    import glob
+    from template_manager import merge_many_metrics_files
+    from validation import comprehensive_file_validation
+    
+    # Expand glob patterns, keeping order and dropping duplicates and the base file
+    sources = []
+    for pattern in source_files:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches or not all(os.path.isfile(match) for match in matches):
+            click.echo(f"❌ No source file(s) found for: {pattern}")
+            return
+        for match in matches:
+            if match not in sources and os.path.abspath(match) != os.path.abspath(base_file):
+                sources.append(match)
+    
+    click.echo(f"Merging measures from {len(sources)} file(s) into {base_file}...")
     
     try:
-        output_path, measures_added, measures_skipped = merge_metrics_files(
+        output_path, results = merge_many_metrics_files(
             base_file, 
-            source_file, 
+            sources, 
             output, 
             validate_columns=check_columns
         )
         
+        if len(results) > 1:
+            for result in results:
+                click.echo(f"  {result['source']}: {result['added']} added, {result['skipped']} skipped")
+        
+        measures_added = sum(result["added"] for result in results)
+        measures_skipped = sum(result["skipped"] for result in results)
+        
         if measures_added > 0:
             click.echo(f"✅ Added {measures_added} measure(s) to {output_path}")
         else:
@@ -103,6 +182,8 @@ def merge_measures_command(base_file, source_file, output, validate, check_colum
         if measures_skipped > 0:
             click.echo(f"⚠️ Skipped {measures_skipped} measure(s) due to missing column references")
             click.echo(f"   See header comments in {output_path} for details")
+        
+        echo_write_counts()
             
         # Validate the generated file if requested
         if validate:
@@ -120,9 +201,12 @@ def merge_measures_command(base_file, source_file, output, validate, check_colum
 
 @cli.command('validate')
 @click.argument('file_path', type=click.Path(exists=True))
-def validate_command(file_path):
-    """Validate a metrics YAML file."""
-    is_valid, errors = comprehensive_file_validation(file_path)
+@click.option('--max-errors', type=int, default=DEFAULT_MAX_ERRORS, show_default=True, help='Stop after this many schema errors (0 for no limit)')
+def validate_command(file_path, max_errors):
+    """Validate a metrics YAML file, reporting every schema error in one pass."""
+    from validation import comprehensive_file_validation
+    
+    is_valid, errors = comprehensive_file_validation(file_path, max_errors=max_errors)
     if is_valid:
         click.echo(f"✅ {file_path} is valid!")
     else:
@@ -130,15 +214,151 @@ def validate_command(file_path):
         for error in errors:
             click.echo(f"  - {error}")
 
+@cli.command('validate-dir')
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--pattern', default='*.yaml', show_default=True, help='Glob pattern for files to validate')
+@click.option('--recursive/--no-recursive', default=True, help='Search subdirectories')
+@click.option('--jobs', type=int, default=None, help='Number of worker processes (default: CPU count)')
+@click.option('--format', 'output_format', type=click.Choice(['text', 'jsonl', 'junit']), default='text', help='Output format')
+@click.option('--output', help='Write results to this file instead of stdout')
+@click.option('--max-errors', type=int, default=DEFAULT_MAX_ERRORS, show_default=True, help='Stop after this many schema errors per file (0 for no limit)')
+def validate_dir_command(directory, pattern, recursive, jobs, output_format, output, max_errors):
+    """Validate every metrics YAML file in DIRECTORY.
+    
+    Files are validated in parallel and results are streamed as they complete.
+    Exits with status 1 if any file fails validation.
+    
+    Example:
+    metrics_cli.py validate-dir metrics/ --jobs 8 --format junit --output validation.xml
+    """
+    from validation import find_yaml_files, validate_files, write_junit_report
+    
+    file_paths = find_yaml_files(directory, pattern, recursive)
+    if not file_paths:
+        click.echo(f"No files matching {pattern} found in {directory}")
+        return
+    
+    stream = open(output, 'w') if output else sys.stdout
+    start = time.perf_counter()
+    results = []
+    try:
+        for result in validate_files(file_paths, jobs=jobs, max_errors=max_errors):
+            results.append(result)
+            if output_format == 'jsonl':
+                stream.write(json.dumps(result) + "\n")
+                stream.flush()
+            elif output_format == 'text':
+                if result["valid"]:
+                    click.echo(f"✅ {result['file']}", file=stream)
+                else:
+                    click.echo(f"❌ {result['file']}", file=stream)
+                    for error in result["errors"]:
+                        click.echo(f"  - {error}", file=stream)
+        
+        if output_format == 'junit':
+            write_junit_report(results, stream)
+    finally:
+        if output:
+            stream.close()
+    
+    failed = sum(1 for result in results if not result["valid"])
+    elapsed = time.perf_counter() - start
+    summary = f"Validated {len(results)} file(s) in {elapsed:.2f}s ({len(results) / elapsed:.0f} files/sec): {failed} failed"
+    click.echo(summary, err=output_format != 'text' and not output)
+    
+    if failed:
+        sys.exit(1)
+
+@cli.command('catalog')
+@click.option('--build', 'build_dir', type=click.Path(exists=True, file_okay=False), help='Scan this directory and rebuild the catalog')
+@click.option('--pattern', default='*.yaml', show_default=True, help='Glob pattern for files to scan with --build')
+@click.option('--name', help='Find expressions used by measures whose name contains this text')
+@click.option('--expression', help='Find files defining this expression (whitespace, case and quoting are ignored); combines with --name')
+@click.option('--catalog-file', help='Catalog location (default: ~/yaml-generator/measure_catalog.json.gz)')
+@click.option('--show-files/--no-show-files', default=True, help='List the files defining each match')
+def catalog_command(build_dir, pattern, name, expression, catalog_file, show_files):
+    """Build or query the fleet-wide measure catalog.
+    
+    The catalog groups measures by normalized expression, so the same
+    calculation under different names or formatting is found together.
+    
+    Example:
+    metrics_cli.py catalog --build metrics/
+    metrics_cli.py catalog --name cpm
+    metrics_cli.py catalog --expression "SUM(clicks) / SUM(impressions) * 100"
+    """
+    from measure_catalog import MeasureCatalog
+    
+    if build_dir:
+        from validation import find_yaml_files
+        
+        start = time.perf_counter()
+        catalog = MeasureCatalog.build(find_yaml_files(build_dir, pattern))
+        path = catalog.save(catalog_file)
+        stats = catalog.stats()
+        click.echo(f"Cataloged {stats['measures']} measures ({stats['expressions']} distinct expressions) from {stats['files']} files in {time.perf_counter() - start:.2f}s")
+        click.echo(f"Catalog written to: {path}")
+    else:
+        catalog = MeasureCatalog.load(catalog_file)
+        if catalog is None:
+            click.echo("No catalog found. Build one with: metrics_cli.py catalog --build DIRECTORY")
+            return
+    
+    if not name and not expression:
+        if not build_dir:
+            stats = catalog.stats()
+            click.echo(f"Catalog: {stats['measures']} measures, {stats['expressions']} distinct expressions, {stats['files']} files")
+        return
+    
+    # Both filters together find the expression only where it goes by that name
+    matches = catalog.find_by_expression(expression) if expression else None
+    if name:
+        matches = catalog.find_by_name(name, matches)
+    if not matches:
+        click.echo("No matching measures found")
+        return
+    
+    for key, entry in sorted(matches, key=lambda match: -match[1]["count"]):
+        names = ", ".join(f"{measure_name} ({count})" for measure_name, count in sorted(entry["names"].items(), key=lambda item: -item[1]))
+        click.echo(f"{key}  {entry['expression']}")
+        click.echo(f"  used {entry['count']} time(s) in {len(entry['files'])} file(s) as: {names}")
+        if show_files:
+            for file_path in catalog.entry_files(entry):
+                click.echo(f"    - {file_path}")
+
 @cli.command('templates')
 @click.option('--generate', is_flag=True, help='Generate template files from examples')
-def templates_command(generate):
-    """List or generate template files."""
+@click.option('--jobs', type=int, default=1, help='Number of worker processes to use with --generate')
+@click.option('--compile', 'compile_templates', is_flag=True, help='Resolve template inheritance into the compiled template table')
+def templates_command(generate, jobs, compile_templates):
+    """List, generate or compile template files."""
+    from template_manager import TemplateManager
+    
     if generate:
-        templates = generate_all_templates()
+        from generate_metrics_yaml import generate_templates
+        
+        start = time.perf_counter()
+        results = generate_templates(jobs)
+        elapsed = time.perf_counter() - start
+        
+        templates = [result["template_file"] for result in results if result["template_file"]]
         click.echo(f"Generated {len(templates)} template files")
+        
+        click.echo("Timing by combination:")
+        for result in results:
+            status = "ok" if result["template_file"] else "failed"
+            click.echo(f"  {result['dsp']:<10} {result['media_type']:<8} {result['seconds']:7.3f}s  {status}")
+        click.echo(f"Total: {elapsed:.3f}s with {max(jobs, 1)} worker(s)")
     
     manager = TemplateManager()
+    
+    if compile_templates:
+        compiled, errors = manager.compile_templates()
+        stats = manager.cache_stats()
+        click.echo(f"Compiled {compiled} templates and presets (cache: {stats['hits']} hit(s), {stats['misses']} miss(es))")
+        for path, error in errors:
+            click.echo(f"❌ {path}: {error}")
+    
     templates = manager.list_templates()
     click.echo("Available templates:")
     for template in templates:
@@ -148,8 +368,11 @@ def templates_command(generate):
 @click.option('--initialize', is_flag=True, help='Initialize preset templates')
 def presets_command(initialize):
     """List or initialize preset templates."""
+    from template_manager import TemplateManager, initialize_presets
+    
     if initialize:
         initialize_presets()
+        echo_write_counts()
     
     manager = TemplateManager()
     presets = manager.list_presets()
@@ -164,6 +387,8 @@ def presets_command(initialize):
 @click.option('--override', multiple=True, help='Override values in format key=value')
 def create_preset_command(name, base_template, description, override):
     """Create a new preset template."""
+    from template_manager import TemplateManager
+    
     # Parse override values
     overrides = {}
     for o in override:
@@ -181,16 +406,72 @@ def create_preset_command(name, base_template, description, override):
     
     if preset_path:
         click.echo(f"Created preset template: {preset_path}")
+        echo_write_counts()
     else:
         click.echo("Failed to create preset template.")
 
+def echo_column_profile(schema_info):
+    """Print the footer statistics and sampled cardinality gathered for each column"""
+    click.echo(f"Column profile ({schema_info['num_row_groups']} row group(s), {schema_info['num_rows']} rows):")
+    for field in schema_info["fields"]:
+        stats = field.get("stats")
+        if not stats:
+            click.echo(f"  {field['name']:<30} {field['type']:<16} no statistics")
+            continue
+        line = f"  {field['name']:<30} {field['type']:<16}"
+        if "num_values" in stats:
+            distinct = stats["distinct_count"] if stats["distinct_count"] is not None else "?"
+            nulls = stats["null_count"] if stats["null_count"] is not None else "?"
+            line += f" min={stats['min']!s:.20} max={stats['max']!s:.20} nulls={nulls} distinct={distinct}"
+        if "sampled_distinct" in stats:
+            line += f" sampled≈{stats['sampled_distinct']}/{stats['sampled_non_null']}"
+        click.echo(line)
+
+def echo_dataset_summary(schema_info):
+    """Print the part count and any schema drift found across a Parquet dataset"""
+    if "num_files" not in schema_info:
+        return
+    click.echo(f"Read {schema_info['num_files']} part file footer(s), {schema_info['num_rows']} rows")
+    
+    partition_keys = [field["name"] for field in schema_info["fields"] if field.get("partition")]
+    if partition_keys:
+        click.echo(f"Partition keys: {', '.join(partition_keys)}")
+    
+    drift = schema_info["drift"]
+    for name, count in drift["added_columns"].items():
+        click.echo(f"Schema drift: column '{name}' is present in only {count} of {schema_info['num_files']} part file(s)")
+    for name, types in drift["type_changes"].items():
+        click.echo(f"Schema drift: column '{name}' has types {' / '.join(types)}")
+
 @cli.command('from-parquet')
-@click.argument('parquet_file', type=click.Path(exists=True))
+@click.argument('parquet_file')
 @click.option('--output', help='Output path for the YAML file')
 @click.option('--model-name', help='Model name to use in the YAML file')
-def from_parquet_command(parquet_file, output, model_name):
-    """Generate a metrics YAML file from a Parquet file."""
-    metrics_yaml = SchemaExtractor.generate_metrics_yaml_from_parquet(parquet_file, output)
+@click.option('--profile', is_flag=True, help='Use Parquet footer statistics to tell ID columns from measures')
+@click.option('--sample-rows', type=int, help='Read up to N rows to estimate column cardinality and drop near-unique columns')
+@click.option('--no-cache', is_flag=True, help='Re-derive the metrics view even if the schema was seen before')
+def from_parquet_command(parquet_file, output, model_name, profile, sample_rows, no_cache):
+    """Generate a metrics YAML file from a Parquet file, directory or glob."""
+    from data_source import SchemaExtractor, SchemaCache
+    from view_writer import write_view
+    
+    # With a model name the view is written once, after it is renamed
+    target = None if model_name else output
+    
+    if no_cache or profile or sample_rows or SchemaExtractor.is_parquet_dataset(parquet_file):
+        schema_info = SchemaExtractor.extract_from_parquet(parquet_file, profile, sample_rows)
+        if schema_info:
+            echo_dataset_summary(schema_info)
+        if (profile or sample_rows) and schema_info:
+            echo_column_profile(schema_info)
+        metrics_yaml = SchemaExtractor.generate_metrics_yaml_from_schema(schema_info, target)
+    else:
+        cache = SchemaCache()
+        metrics_yaml = SchemaExtractor.generate_metrics_yaml_from_parquet(parquet_file, target, cache=cache)
+        cache.save()
+        stats = cache.stats()
+        click.echo(f"Schema cache: {stats['hits']} hit(s), {stats['misses']} miss(es), "
+                   f"{stats['entries']} entries, {stats['evictions']} evicted")
     
     if metrics_yaml:
         if model_name:
@@ -199,43 +480,102 @@ def from_parquet_command(parquet_file, output, model_name):
             
             # Update output file with model name if specified
             if output:
-                with open(output, 'w') as file:
-                    # Generate header
-                    header = "# Metrics view YAML - Auto-generated from Parquet\n"
-                    header += "# Reference documentation: https://docs.rilldata.com/reference/project-files/dashboards\n\n"
-                    
-                    file.write(header)
-                    yaml.dump(metrics_yaml, file, sort_keys=False, default_flow_style=False)
+                # Generate header
+                header = "# Metrics view YAML - Auto-generated from Parquet\n"
+                header += "# Reference documentation: https://docs.rilldata.com/reference/project-files/dashboards\n\n"
+                write_view(output, metrics_yaml, header)
         
         click.echo(f"Generated metrics YAML from Parquet file: {parquet_file}")
         if output:
             click.echo(f"Output file: {output}")
+            echo_write_counts()
     else:
         click.echo(f"Failed to generate metrics YAML from Parquet file: {parquet_file}")
 
 @cli.command('update-from-parquet')
 @click.argument('yaml_file', type=click.Path(exists=True))
-@click.argument('parquet_file', type=click.Path(exists=True))
+@click.argument('parquet_file')
 @click.option('--output', help='Output path for the updated YAML file')
-def update_from_parquet_command(yaml_file, parquet_file, output):
-    """Update an existing YAML file with schema from a Parquet file."""
-    schema_info = SchemaExtractor.extract_from_parquet(parquet_file)
+@click.option('--profile', is_flag=True, help='Use Parquet footer statistics to tell ID columns from measures')
+@click.option('--sample-rows', type=int, help='Read up to N rows to estimate column cardinality and drop near-unique columns')
+def update_from_parquet_command(yaml_file, parquet_file, output, profile, sample_rows):
+    """Update an existing YAML file with schema from a Parquet file, directory or glob."""
+    from data_source import SchemaExtractor
+    
+    schema_info = SchemaExtractor.extract_from_parquet(parquet_file, profile, sample_rows)
     
     if not schema_info:
         click.echo(f"Failed to extract schema from Parquet file: {parquet_file}")
-        return
+        sys.exit(1)
+    echo_dataset_summary(schema_info)
+    if profile or sample_rows:
+        echo_column_profile(schema_info)
     
     # Default to input file if output not specified
     if not output:
         output = yaml_file
     
-    updated_yaml = SchemaExtractor.update_existing_yaml(yaml_file, schema_info, output)
+    result = SchemaExtractor.update_existing_yaml_file(yaml_file, schema_info, output)
     
-    if updated_yaml:
+    if not result:
+        click.echo(f"Failed to update YAML file: {yaml_file}")
+        sys.exit(1)
+    elif result["written"]:
         click.echo(f"Updated YAML file with schema from Parquet file: {parquet_file}")
+        if result["dimensions_added"]:
+            click.echo(f"  Added dimensions: {', '.join(result['dimensions_added'])}")
+        if result["measures_added"]:
+            click.echo(f"  Added measures: {', '.join(result['measures_added'])}")
         click.echo(f"Output file: {output}")
     else:
-        click.echo(f"Failed to update YAML file: {yaml_file}")
+        click.echo(f"No schema changes from {parquet_file}; {output} left untouched")
+
+@cli.command('update-from-parquet-bulk')
+@click.argument('mapping', type=click.Path(exists=True))
+@click.option('--jobs', type=int, default=1, help='Number of worker processes computing updates')
+@click.option('--threads', type=int, help='Number of threads reading Parquet footers')
+@click.option('--profile', is_flag=True, help='Use Parquet footer statistics to tell ID columns from measures')
+@click.option('--sample-rows', type=int, help='Read up to N rows per source to estimate column cardinality')
+@click.option('--report', help='Path for a JSON summary report')
+def update_from_parquet_bulk_command(mapping, jobs, threads, profile, sample_rows, report):
+    """Update every metrics YAML file in MAPPING from its Parquet source.
+    
+    MAPPING is a YAML dict of YAML path -> Parquet path, or a YAML list, CSV
+    or JSON lines file with yaml, parquet and optional output columns. Only
+    files that gain new dimensions or measures are written.
+    
+    Example:
+    metrics_cli.py update-from-parquet-bulk nightly_mapping.yaml --jobs 4 --report refresh.json
+    """
+    from bulk_update import bulk_update, write_report
+    
+    try:
+        summary = bulk_update(mapping, jobs=jobs, threads=threads, profile=profile, sample_rows=sample_rows)
+    except (OSError, ValueError) as e:
+        click.echo(f"❌ Error reading mapping: {str(e)}")
+        sys.exit(1)
+    
+    for result in summary["files"]:
+        if not result["success"]:
+            click.echo(f"❌ {result['yaml']}")
+            for error in result["errors"]:
+                click.echo(f"  - {error}")
+        elif result["written"]:
+            added = len(result["dimensions_added"]) + len(result["measures_added"])
+            click.echo(f"✅ {result['output']}: {added} entr{'y' if added == 1 else 'ies'} added")
+    
+    click.echo(f"{summary['written']} written, {summary['unchanged']} unchanged, {summary['failed']} failed "
+               f"of {summary['total']} files ({summary['sources']} Parquet sources)")
+    click.echo(f"Footers: {summary['footer_seconds']:.2f}s on {summary['threads']} thread(s), "
+               f"updates: {summary['update_seconds']:.2f}s with {summary['jobs']} worker(s), "
+               f"total: {summary['seconds']:.2f}s")
+    
+    if report:
+        write_report(summary, report)
+        click.echo(f"Report written to: {report}")
+    
+    if summary["failed"]:
+        sys.exit(1)
 
 if __name__ == "__main__":
     # Create preset directory if it doesn't exist
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+In-memory model of a metrics view with lookup indexes
+
+A MetricsView holds a view's dimensions and measures as compact Dimension
+and Measure records (see _Record) and keeps name, column and expression
+indexes up to date as entries are added or overridden, so merging overrides,
+deduplicating generated entries and checking for duplicates are O(1) per
+item instead of a scan of the list.
+
+    view = MetricsView.from_dict(data)
+    view.upsert_measure({"name": "ctr", "format_preset": "percentage"})
+    view.add_dimension({"name": "region", "column": "region"})
+    data = view.to_dict()
+"""
+
+import sys
+
+DIMENSIONS = "dimensions"
+MEASURES = "measures"
+
+def _name_key(name):
+    """Case-insensitive name, used when deciding whether an entry is new"""
+    return None if name is None else str(name).lower()
+
+def _expression_key(expression):
+    """Normalized expression hash, so formatting differences still match"""
+    from measure_catalog import expression_hash
+    return expression_hash(expression)
+
+# Cap on the number of distinct key orders shared between records
+KEY_ORDER_CACHE_SIZE = 1024
+
+# Key orders seen so far; records share one tuple per distinct order
+_key_orders = {}
+
+def _shared_key_order(keys):
+    keys = tuple(sys.intern(key) if isinstance(key, str) else key for key in keys)
+    shared = _key_orders.get(keys)
+    if shared is not None:
+        return shared
+    # Arbitrary user keys could otherwise grow the table without bound in a
+    # long-running process; once full, new orders are simply not shared
+    if len(_key_orders) < KEY_ORDER_CACHE_SIZE:
+        _key_orders[keys] = keys
+    return keys
+
+class _Record:
+    """Base for dimension and measure records
+    
+    Known keys are stored in slots, with their string values interned since
+    the same names, columns, presets and expressions recur across thousands
+    of views. Any other keys go into `extra`. The original key order is kept
+    as a shared tuple, so to_dict() reproduces the mapping exactly.
+    """
+    
+    FIELDS = ()
+    __slots__ = ("_keys", "extra")
+    
+    def __init__(self, data=None, **fields):
+        for field in self.FIELDS:
+            setattr(self, field, None)
+        self._keys = ()
+        self.extra = None
+        self.update(data or {})
+        if fields:
+            self.update(fields)
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data)
+    
+    def update(self, data):
+        """Set keys from a mapping, appending new keys to the key order"""
+        new_keys = [key for key in data if key not in self._keys]
+        for key, value in data.items():
+            if key in self.FIELDS:
+                setattr(self, key, sys.intern(value) if type(value) is str else value)
+            else:
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[key] = value
+        if new_keys:
+            self._keys = _shared_key_order(self._keys + tuple(new_keys))
+    
+    def get(self, key, default=None):
+        if key not in self._keys:
+            return default
+        if key in self.FIELDS:
+            return getattr(self, key)
+        return self.extra[key]
+    
+    def to_dict(self):
+        """The record as a YAML mapping, in its original key order"""
+        return {key: self.get(key) for key in self._keys}
+    
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+    
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+class Dimension(_Record):
+    """A dimension entry"""
+    
+    FIELDS = ("name", "display_name", "label", "column", "expression", "description")
+    __slots__ = FIELDS
+    
+    @property
+    def identifier(self):
+        # Older views identify some dimensions by label only
+        return self.name or self.label
+    
+    @property
+    def source(self):
+        """Column or expression the dimension reads"""
+        return self.column or self.expression
+
+class Measure(_Record):
+    """A measure entry"""
+    
+    FIELDS = (
+        "name", "label", "display_name", "expression", "description",
+        "format_preset", "format_d3", "valid_percent_of_total"
+    )
+    __slots__ = FIELDS
+
+class MetricsView:
+    """Dimensions and measures of one view plus their lookup indexes
+
+    The last entry with a given name is the one the name index points to, so
+    upserts update it as a dict built over the list would. Earlier entries
+    with the same name are kept (so nothing is lost on a round trip) and
+    reported by duplicate_dimension_names/duplicate_measure_names. add_*
+    compare names case-insensitively, upsert_* exactly.
+    """
+
+    __slots__ = (
+        "data", "dimensions", "measures",
+        "_dimensions_by_name", "_dimensions_by_column", "_dimension_name_keys",
+        "_measures_by_name", "_measures_by_expression", "_measure_name_keys",
+        "duplicate_dimension_names", "duplicate_measure_names"
+    )
+
+    def __init__(self, data=None):
+        # Sections stay in place as None so to_dict() keeps the key order
+        self.data = {
+            key: None if key in (DIMENSIONS, MEASURES) else value
+            for key, value in (data or {}).items()
+        }
+        self.dimensions = []
+        self.measures = []
+        self._dimensions_by_name = {}
+        self._dimensions_by_column = {}
+        self._dimension_name_keys = set()
+        self._measures_by_name = {}
+        self._measure_name_keys = set()
+        # Built on first use; hashing every expression is only worth it when needed
+        self._measures_by_expression = None
+        self.duplicate_dimension_names = []
+        self.duplicate_measure_names = []
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a view from its YAML mapping, indexing every entry"""
+        view = cls(data)
+        for item in (data or {}).get(DIMENSIONS) or []:
+            view._append_dimension(Dimension.from_dict(item))
+        for item in (data or {}).get(MEASURES) or []:
+            view._append_measure(Measure.from_dict(item))
+        return view
+
+    def to_dict(self):
+        """The view as a YAML mapping, keeping the original key order"""
+        result = {}
+        for key, value in self.data.items():
+            if key == DIMENSIONS:
+                value = [dimension.to_dict() for dimension in self.dimensions]
+            elif key == MEASURES:
+                value = [measure.to_dict() for measure in self.measures]
+            result[key] = value
+        if DIMENSIONS not in result and self.dimensions:
+            result[DIMENSIONS] = [dimension.to_dict() for dimension in self.dimensions]
+        if MEASURES not in result and self.measures:
+            result[MEASURES] = [measure.to_dict() for measure in self.measures]
+        return result
+
+    def _append_dimension(self, dimension):
+        self.dimensions.append(dimension)
+        name = dimension.identifier
+        if name in self._dimensions_by_name:
+            self.duplicate_dimension_names.append(name)
+        self._dimensions_by_name[name] = dimension
+        self._dimension_name_keys.add(_name_key(name))
+        column = dimension.source
+        if column is not None:
+            self._dimensions_by_column.setdefault(column, dimension)
+
+    def _append_measure(self, measure):
+        self.measures.append(measure)
+        name = measure.name
+        if name in self._measures_by_name:
+            self.duplicate_measure_names.append(name)
+        self._measures_by_name[name] = measure
+        self._measure_name_keys.add(_name_key(name))
+        if self._measures_by_expression is not None and measure.expression:
+            self._measures_by_expression.setdefault(_expression_key(measure.expression), measure)
+
+    def find_dimension(self, name):
+        return self._dimensions_by_name.get(name)
+
+    def find_dimension_by_column(self, column):
+        return self._dimensions_by_column.get(column)
+
+    def find_measure(self, name):
+        return self._measures_by_name.get(name)
+
+    def find_measure_by_expression(self, expression):
+        """Measure whose expression normalizes to the same text, or None"""
+        if not expression:
+            return None
+        if self._measures_by_expression is None:
+            self._measures_by_expression = {}
+            for measure in self.measures:
+                if measure.expression:
+                    self._measures_by_expression.setdefault(_expression_key(measure.expression), measure)
+        return self._measures_by_expression.get(_expression_key(expression))
+
+    def add_dimension(self, item):
+        """Append a dimension unless its name (case-insensitive) or column is already used
+
+        Returns:
+            True if the dimension was added
+        """
+        dimension = Dimension.from_dict(item)
+        if _name_key(dimension.identifier) in self._dimension_name_keys:
+            return False
+        if dimension.source is not None and dimension.source in self._dimensions_by_column:
+            return False
+        self._append_dimension(dimension)
+        return True
+
+    def add_measure(self, item):
+        """Append a measure unless its name (case-insensitive) or normalized
+        expression is already used
+
+        Returns:
+            True if the measure was added
+        """
+        measure = Measure.from_dict(item)
+        if _name_key(measure.name) in self._measure_name_keys:
+            return False
+        if self.find_measure_by_expression(measure.expression):
+            return False
+        self._append_measure(measure)
+        return True
+
+    def upsert_dimension(self, item):
+        """Update the dimension with item's name from item, or append item"""
+        existing = self._dimensions_by_name.get(item.get("name")) if "name" in item else None
+        if existing is None:
+            self._append_dimension(Dimension.from_dict(item))
+            return
+        old_source = existing.source
+        existing.update(item)
+        if existing.source == old_source:
+            return
+        if old_source is not None and self._dimensions_by_column.get(old_source) is existing:
+            # Hand the old column to another dimension still reading it, if any
+            del self._dimensions_by_column[old_source]
+            for dimension in self.dimensions:
+                if dimension.source == old_source:
+                    self._dimensions_by_column[old_source] = dimension
+                    break
+        if existing.source is not None:
+            self._dimensions_by_column.setdefault(existing.source, existing)
+
+    def upsert_measure(self, item):
+        """Update the measure with item's name from item, or append item"""
+        existing = self._measures_by_name.get(item.get("name")) if "name" in item else None
+        if existing is None:
+            self._append_measure(Measure.from_dict(item))
+            return
+        old_expression = existing.expression
+        existing.update(item)
+        if existing.expression == old_expression or self._measures_by_expression is None:
+            return
+        if old_expression:
+            old_key = _expression_key(old_expression)
+            if self._measures_by_expression.get(old_key) is existing:
+                # Hand the old expression to another measure still using it, if any
+                del self._measures_by_expression[old_key]
+                for measure in self.measures:
+                    if measure.expression and _expression_key(measure.expression) == old_key:
+                        self._measures_by_expression[old_key] = measure
+                        break
+        if existing.expression:
+            self._measures_by_expression.setdefault(_expression_key(existing.expression), existing)
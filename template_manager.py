@@ -1,21 +1,284 @@
 #!/usr/bin/env python3
 import os
-import yaml
+import copy
+import json
+import yaml_io
 import shutil
-import re
 from datetime import datetime
+from expression_parser import extract_columns
+from metrics_view import MetricsView
+from view_writer import write_view
 
 # Template directory path
 TEMPLATE_DIR = os.path.expanduser("~/yaml-generator/templates")
 PRESET_DIR = os.path.expanduser("~/yaml-generator/presets")
 
+# Templates and presets shipped with the tool
+BUNDLED_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+BUNDLED_PRESET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "presets")
+
+# Compiled (inheritance-resolved) templates, reused across processes
+COMPILED_TEMPLATES_PATH = os.path.expanduser("~/yaml-generator/compiled_templates.json")
+COMPILED_TEMPLATES_VERSION = 3
+
+# Top-level key naming the template a template or preset is based on
+EXTENDS_KEY = "extends"
+
+def template_reference_candidates(reference, template_dir=None, preset_dir=None, relative_to=None):
+    """Paths an `extends:` reference may name, in lookup order
+    
+    A relative reference is looked up in the user's template and preset
+    directories, then in the bundled ones, then next to the extending file.
+    In each, "ttd/display" may name ttd/display_template.yaml or
+    ttd/display.yaml, and "basic_display" basic_display.yaml.
+    """
+    reference = os.path.expanduser(str(reference))
+    if os.path.isabs(reference):
+        return [reference]
+    
+    names = [reference]
+    if not reference.endswith(".yaml"):
+        names = [f"{reference}_template.yaml", f"{reference}.yaml"]
+    
+    roots = [
+        template_dir or TEMPLATE_DIR, preset_dir or PRESET_DIR,
+        BUNDLED_TEMPLATE_DIR, BUNDLED_PRESET_DIR
+    ]
+    if relative_to:
+        roots.append(relative_to)
+    
+    candidates = []
+    for root in roots:
+        for name in names:
+            candidate = os.path.abspath(os.path.join(root, name))
+            if candidate not in candidates:
+                candidates.append(candidate)
+    return candidates
+
+def resolve_template_reference(reference, template_dir=None, preset_dir=None, relative_to=None):
+    """Turn an `extends:` reference into a file path (see template_reference_candidates)"""
+    for candidate in template_reference_candidates(reference, template_dir, preset_dir, relative_to):
+        if os.path.isfile(candidate):
+            return candidate
+    raise FileNotFoundError(f"Template '{reference}' not found")
+
+def merge_template(base, delta):
+    """Apply a template delta on top of a resolved base template
+    
+    Follows customize_template: dicts are updated, dimensions and measures
+    are merged by name (matching items updated, new ones appended), other
+    lists are extended and anything else is replaced. Keys missing from the
+    base are added. Neither argument is modified.
+    """
+    merged = copy.deepcopy(base)
+    view = MetricsView.from_dict(merged)
+    for key, value in delta.items():
+        if key == EXTENDS_KEY:
+            continue
+        value = copy.deepcopy(value)
+        current = merged.get(key)
+        
+        if isinstance(value, dict) and isinstance(current, dict):
+            current.update(value)
+        elif isinstance(value, list) and isinstance(current, list):
+            if key == "dimensions":
+                for item in value:
+                    view.upsert_dimension(item)
+            elif key == "measures":
+                for item in value:
+                    view.upsert_measure(item)
+            else:
+                current.extend(value)
+        else:
+            merged[key] = value
+    
+    # Write the merged dimensions and measures back in place
+    for key, items in view.to_dict().items():
+        if key in ("dimensions", "measures") and isinstance(merged.get(key), list):
+            merged[key] = items
+    return merged
+
+class TemplateCache:
+    """Compiled templates and directory listings, revalidated by mtime
+    
+    A template that `extends:` another is flattened once into a compiled
+    entry that records the mtime and size of every file in its inheritance
+    chain, plus the paths checked before each base was found. The entry is
+    reused while none of those files changed and none of those paths has
+    appeared, so editing a base template only recompiles the templates
+    built on it, and a new file that would now shadow a base recompiles too.
+    Entries are keyed by the template's path and the template and preset
+    directories its bases were looked up in, so managers with different
+    directories sharing one cache never get each other's bases. With a
+    compiled_path the compiled table is also kept on disk (see save()) and
+    shared between processes.
+    
+    A cached listing is reused while none of the directories it was built
+    from has a new mtime (adding, removing or renaming a file updates its
+    directory's mtime). load() returns a deep copy, so callers are free to
+    modify what they get without affecting later loads.
+    """
+    
+    def __init__(self, compiled_path=None):
+        self.compiled_path = compiled_path
+        self.files = {}
+        self.listings = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._compiled_loaded = compiled_path is None
+    
+    def _load_compiled(self):
+        """Read the on-disk compiled table the first time it is needed"""
+        self._compiled_loaded = True
+        try:
+            with open(self.compiled_path, 'r') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == COMPILED_TEMPLATES_VERSION:
+            for key, entry in data.get("templates", {}).items():
+                self.files.setdefault(key, entry)
+    
+    @staticmethod
+    def _unchanged(dependencies):
+        """Whether every [path, mtime_ns, size] dependency is as recorded
+        
+        A dependency with no mtime is a path that must still not exist.
+        """
+        try:
+            for path, mtime, size in dependencies:
+                if mtime is None:
+                    if os.path.exists(path):
+                        return False
+                    continue
+                stat_result = os.stat(path)
+                if stat_result.st_mtime_ns != mtime or stat_result.st_size != size:
+                    return False
+        except OSError:
+            return False
+        return True
+    
+    def load(self, path, template_dir=None, preset_dir=None):
+        """Return a copy of the compiled template at path
+        
+        Raises like yaml_io.load_file for unreadable files, FileNotFoundError
+        for a missing base template and ValueError for an inheritance cycle.
+        """
+        if not self._compiled_loaded:
+            self._load_compiled()
+        return copy.deepcopy(self._compile(os.path.abspath(path), template_dir, preset_dir, ()))
+    
+    @staticmethod
+    def _entry_key(path, template_dir, preset_dir):
+        """Key of a compiled entry: the file plus the directories bases resolve in"""
+        return json.dumps([
+            path,
+            os.path.abspath(template_dir or TEMPLATE_DIR),
+            os.path.abspath(preset_dir or PRESET_DIR)
+        ])
+    
+    def _compile(self, path, template_dir, preset_dir, chain):
+        if path in chain:
+            raise ValueError(f"Template inheritance cycle: {' -> '.join(chain + (path,))}")
+        
+        key = self._entry_key(path, template_dir, preset_dir)
+        entry = self.files.get(key)
+        if entry is not None and self._unchanged(entry["dependencies"]):
+            self.hits += 1
+            return entry["data"]
+        
+        self.misses += 1
+        stat_result = os.stat(path)
+        data = yaml_io.load_file(path)
+        dependencies = [[path, stat_result.st_mtime_ns, stat_result.st_size]]
+        
+        if isinstance(data, dict) and EXTENDS_KEY in data:
+            candidates = template_reference_candidates(
+                data[EXTENDS_KEY], template_dir, preset_dir, os.path.dirname(path)
+            )
+            base_path = next((candidate for candidate in candidates if os.path.isfile(candidate)), None)
+            if base_path is None:
+                raise FileNotFoundError(f"Template '{data[EXTENDS_KEY]}' not found")
+            
+            # Paths that would take precedence over the base if they appeared
+            dependencies += [[candidate, None, None] for candidate in candidates[:candidates.index(base_path)]]
+            base = self._compile(base_path, template_dir, preset_dir, chain + (path,))
+            data = merge_template(base, data)
+            dependencies += self.files[self._entry_key(base_path, template_dir, preset_dir)]["dependencies"]
+        
+        self.files[key] = {"dependencies": dependencies, "data": data}
+        self._dirty = True
+        return data
+    
+    def save(self):
+        """Write the compiled table to compiled_path if anything was recompiled"""
+        if not self.compiled_path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.compiled_path)), exist_ok=True)
+        tmp_path = f"{self.compiled_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump({"version": COMPILED_TEMPLATES_VERSION, "templates": self.files}, file, separators=(",", ":"))
+        os.replace(tmp_path, self.compiled_path)
+        self._dirty = False
+    
+    def listing(self, key, build):
+        """Return a cached directory listing, rebuilding it when a directory changed
+        
+        Args:
+            key: Cache key for the listing
+            build: Function returning (entries, directories_scanned)
+        """
+        cached = self.listings.get(key)
+        if cached is not None:
+            entries, directories = cached
+            try:
+                if all(os.stat(directory).st_mtime_ns == mtime for directory, mtime in directories):
+                    self.hits += 1
+                    return list(entries)
+            except OSError:
+                pass
+        
+        self.misses += 1
+        entries, scanned = build()
+        directories = [(directory, os.stat(directory).st_mtime_ns) for directory in scanned]
+        self.listings[key] = (entries, directories)
+        return list(entries)
+    
+    def clear(self):
+        """Drop every cached file and listing (the on-disk table is kept)"""
+        self.files.clear()
+        self.listings.clear()
+        self._compiled_loaded = True
+    
+    def stats(self):
+        """Hit/miss counts and number of cached files and listings"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "files": len(self.files),
+            "listings": len(self.listings)
+        }
+
+# Shared by every TemplateManager (and create_metrics_yaml) in the process
+_shared_cache = TemplateCache(COMPILED_TEMPLATES_PATH)
+
+def shared_template_cache():
+    """The process-wide TemplateCache"""
+    return _shared_cache
+
 class TemplateManager:
     """Manage templates for metrics YAML generation"""
     
-    def __init__(self, template_dir=None, preset_dir=None):
-        """Initialize the template manager"""
+    def __init__(self, template_dir=None, preset_dir=None, cache=None):
+        """Initialize the template manager
+        
+        Parsed templates and directory listings are kept in cache, by
+        default the process-wide shared cache.
+        """
         self.template_dir = template_dir or TEMPLATE_DIR
         self.preset_dir = preset_dir or PRESET_DIR
+        self.cache = cache or _shared_cache
         
         # Ensure directories exist
         os.makedirs(self.template_dir, exist_ok=True)
@@ -23,19 +286,27 @@ class TemplateManager:
     
     def list_templates(self):
         """List all available templates"""
+        return self.cache.listing(("templates", self.template_dir), self._scan_templates)
+    
+    def _scan_templates(self):
         templates = []
+        directories = []
         
         # List templates from the template directory
         for root, dirs, files in os.walk(self.template_dir):
+            directories.append(root)
             for file in files:
                 if file.endswith("_template.yaml"):
                     rel_path = os.path.relpath(os.path.join(root, file), self.template_dir)
                     templates.append(rel_path)
         
-        return templates
+        return templates, directories
     
     def list_presets(self):
         """List all available preset templates"""
+        return self.cache.listing(("presets", self.preset_dir), self._scan_presets)
+    
+    def _scan_presets(self):
         presets = []
         
         # List templates from the preset directory
@@ -43,7 +314,7 @@ class TemplateManager:
             if file.endswith(".yaml"):
                 presets.append(file)
         
-        return presets
+        return presets, [self.preset_dir]
     
     def load_template(self, template_path):
         """Load a template file"""
@@ -59,21 +330,35 @@ class TemplateManager:
             if os.path.exists(rel_path):
                 template_path = rel_path
         
-        # Load the template file
+        # Load the compiled template (a private copy, so callers may modify it)
         try:
-            with open(template_path, 'r') as file:
-                # Skip comments
-                yaml_content = ""
-                for line in file:
-                    if not line.strip().startswith('#'):
-                        yaml_content += line
-                
-                # Parse YAML content
-                data = yaml.safe_load(yaml_content)
-                return data
+            template_data = self.cache.load(template_path, self.template_dir, self.preset_dir)
         except Exception as e:
             print(f"Error loading template {template_path}: {e}")
             return None
+        self.cache.save()
+        return template_data
+    
+    def compile_templates(self):
+        """Resolve every template and preset into the compiled table
+        
+        Returns:
+            Tuple of (number_compiled, errors) where errors lists
+            (relative_path, message) pairs
+        """
+        paths = [os.path.join(self.template_dir, template) for template in self.list_templates()]
+        paths += [os.path.join(self.preset_dir, preset) for preset in self.list_presets()]
+        
+        compiled = 0
+        errors = []
+        for path in paths:
+            try:
+                self.cache.load(path, self.template_dir, self.preset_dir)
+                compiled += 1
+            except Exception as e:
+                errors.append((path, str(e)))
+        self.cache.save()
+        return compiled, errors
     
     def extract_column_references(self, expression):
         """Extract column references from a SQL expression
@@ -84,26 +369,11 @@ class TemplateManager:
         Returns:
             Set of column names referenced in the expression
         """
-        # Find all column references in the expression - look for:
-        # 1. Column names in double quotes: "column_name"
-        # 2. Simple column names without quotes: column_name
-        # This is a simplified approach and might not catch all cases
-        quoted_columns = re.findall(r'"([^"]+)"', expression)
-        
-        # For unquoted columns, we need a more careful approach to avoid catching function names
-        # This regex looks for identifiers that aren't preceded by a dot (to avoid table.column) 
-        # and aren't followed by an opening parenthesis (to avoid functions)
-        simple_columns = []
-        for match in re.finditer(r'(?<!\.)(?<!\w)([a-zA-Z_][a-zA-Z0-9_]*)(?!\s*\()', expression):
-            # Skip SQL keywords and function names
-            if match.group(1).lower() not in ['select', 'from', 'where', 'group', 'order', 'by', 
-                                             'having', 'if', 'case', 'when', 'then', 'else', 
-                                             'end', 'and', 'or', 'not', 'null', 'true', 'false',
-                                             'sum', 'count', 'avg', 'min', 'max', 'stddev', 
-                                             'distinct', 'as', 'in', 'between', 'is', 'like']:
-                simple_columns.append(match.group(1))
-        
-        return set(quoted_columns + simple_columns)
+        return extract_columns(expression)
+    
+    def cache_stats(self):
+        """Hit/miss counts of the template cache"""
+        return self.cache.stats()
     
     def get_available_columns(self, dimensions):
         """Extract available columns from dimensions list
@@ -134,21 +404,33 @@ class TemplateManager:
         Returns:
             Tuple of (path_to_output_file, number_of_measures_added, number_of_measures_skipped)
         """
+        output_file, results = self.merge_measures_many(base_file, [source_file], output_file, validate_columns)
+        return output_file, results[0]["added"], results[0]["skipped"]
+    
+    def merge_measures_many(self, base_file, source_files, output_file=None, validate_columns=True):
+        """Merge measures from several source files into base_file in one pass
+        
+        The base file's available columns are computed once, each source is
+        loaded and checked in turn, and the output is written once at the end.
+        
+        Args:
+            base_file: Path to the base YAML file that will receive new measures
+            source_files: Paths of the source YAML files, merged in order
+            output_file: Optional path for the output file. If not provided, base_file will be overwritten
+            validate_columns: Whether to check if columns exist in base dataset
+            
+        Returns:
+            Tuple of (path_to_output_file, per_source_results) where each result has
+            source, added, skipped and incompatible (list of skipped measure details)
+        """
         # Default output to base file if not specified
         if not output_file:
             output_file = base_file
-            
-        # Load both YAML files
-        with open(base_file, 'r') as f:
-            base_yaml = yaml.safe_load(f)
-            
-        with open(source_file, 'r') as f:
-            source_yaml = yaml.safe_load(f)
-            
-        # Get existing measure names to avoid duplicates
+        
+        base_yaml = yaml_io.load_file(base_file)
         base_measures = base_yaml.get("measures", [])
-        source_measures = source_yaml.get("measures", [])
         
+        # Get existing measure names to avoid duplicates
         existing_measure_names = {measure.get("name") for measure in base_measures}
         
         # Get available columns from base dimensions
@@ -160,36 +442,37 @@ class TemplateManager:
                 refs = self.extract_column_references(measure.get("expression"))
                 available_columns.update(refs)
         
-        # Add measures from source that don't exist in base
-        measures_added = 0
-        measures_skipped = 0
-        
-        # Track incompatible measures with reasons for reporting
-        incompatible_measures = []
-        
-        for measure in source_measures:
-            # Skip if measure already exists
-            if measure.get("name") in existing_measure_names:
-                continue
+        results = []
+        for source_file in source_files:
+            source_yaml = yaml_io.load_file(source_file) or {}
+            result = {"source": source_file, "added": 0, "skipped": 0, "incompatible": []}
+            
+            for measure in source_yaml.get("measures", []):
+                # Skip if measure already exists (in the base or an earlier source)
+                if measure.get("name") in existing_measure_names:
+                    continue
                 
-            # Check if all column references exist in base dataset
-            if validate_columns and "expression" in measure:
-                column_refs = self.extract_column_references(measure.get("expression"))
-                missing_columns = [col for col in column_refs if col not in available_columns]
+                # Check if all column references exist in base dataset
+                if validate_columns and "expression" in measure:
+                    column_refs = self.extract_column_references(measure.get("expression"))
+                    missing_columns = sorted(col for col in column_refs if col not in available_columns)
+                    
+                    if missing_columns:
+                        result["skipped"] += 1
+                        result["incompatible"].append({
+                            "name": measure.get("name"),
+                            "missing_columns": missing_columns,
+                            "expression": measure.get("expression")
+                        })
+                        continue
                 
-                if missing_columns:
-                    measures_skipped += 1
-                    incompatible_measures.append({
-                        "name": measure.get("name"),
-                        "missing_columns": missing_columns,
-                        "expression": measure.get("expression")
-                    })
-                    continue
+                # Add measure if it passed validation
+                base_measures.append(measure)
+                existing_measure_names.add(measure.get("name"))
+                result["added"] += 1
             
-            # Add measure if it passed validation
-            base_measures.append(measure)
-            measures_added += 1
-                
+            results.append(result)
+        
         # Update the measures in the base YAML
         base_yaml["measures"] = base_measures
         
@@ -198,23 +481,27 @@ class TemplateManager:
         header += "# Reference documentation: https://docs.rilldata.com/reference/project-files/dashboards\n"
         header += f"# Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
         header += f"# Base file: {os.path.basename(base_file)}\n"
-        header += f"# Added measures from: {os.path.basename(source_file)}\n"
         
+        for result in results:
+            header += f"# Added measures from: {os.path.basename(result['source'])} ({result['added']} added, {result['skipped']} skipped)\n"
+        
+        measures_skipped = sum(result["skipped"] for result in results)
         if measures_skipped > 0:
             header += f"# WARNING: {measures_skipped} measures were skipped due to missing column references\n"
             
             # Add details about skipped measures
-            for i, measure in enumerate(incompatible_measures):
-                header += f"# Skipped measure #{i+1}: {measure['name']} - Missing columns: {', '.join(measure['missing_columns'])}\n"
+            skipped_number = 0
+            for result in results:
+                for measure in result["incompatible"]:
+                    skipped_number += 1
+                    header += f"# Skipped measure #{skipped_number}: {measure['name']} ({os.path.basename(result['source'])}) - Missing columns: {', '.join(measure['missing_columns'])}\n"
         
         header += "\n"
         
         # Write the output file
-        with open(output_file, 'w') as f:
-            f.write(header)
-            yaml.dump(base_yaml, f, sort_keys=False, default_flow_style=False)
+        write_view(output_file, base_yaml, header)
             
-        return output_file, measures_added, measures_skipped
+        return output_file, results
     
     def save_preset(self, name, data, description=None):
         """Save a template as a preset"""
@@ -232,9 +519,7 @@ class TemplateManager:
         
         # Write the preset file
         try:
-            with open(preset_path, 'w') as file:
-                file.write(header)
-                yaml.dump(data, file, sort_keys=False, default_flow_style=False)
+            write_view(preset_path, data, header)
             return preset_path
         except Exception as e:
             print(f"Error saving preset {name}: {e}")
@@ -245,6 +530,9 @@ class TemplateManager:
         if not overrides:
             return template_data
         
+        # Index dimensions and measures once for all overrides
+        view = MetricsView.from_dict(template_data)
+        
         # Apply overrides to the template
         for key, value in overrides.items():
             if key in template_data:
@@ -253,16 +541,13 @@ class TemplateManager:
                     template_data[key].update(value)
                 elif isinstance(value, list) and isinstance(template_data[key], list):
                     # For lists, we have special handling based on key
-                    if key == "dimensions" or key == "measures":
+                    if key == "dimensions":
                         # For dimensions and measures, merge by name
-                        existing_items = {item.get("name", ""): item for item in template_data[key]}
                         for item in value:
-                            if "name" in item and item["name"] in existing_items:
-                                # Update existing item
-                                existing_items[item["name"]].update(item)
-                            else:
-                                # Add new item
-                                template_data[key].append(item)
+                            view.upsert_dimension(item)
+                    elif key == "measures":
+                        for item in value:
+                            view.upsert_measure(item)
                     else:
                         # For other lists, append new items
                         template_data[key].extend(value)
@@ -270,20 +555,56 @@ class TemplateManager:
                     # Replace value
                     template_data[key] = value
         
+        # Write the merged dimensions and measures back
+        for key, items in view.to_dict().items():
+            if key in ("dimensions", "measures") and isinstance(template_data.get(key), list):
+                template_data[key] = items
+        
         return template_data
     
+    def template_reference(self, template_path):
+        """Short `extends:` reference for a template or preset path
+        
+        "ttd/display_template.yaml" becomes "ttd/display" and a preset file
+        becomes its name, as long as that name resolves back to the same file
+        (a user template can shadow a bundled one); any other path is kept
+        as an absolute path.
+        """
+        path = os.path.abspath(template_path)
+        directories = (
+            (self.template_dir, "_template.yaml"), (self.preset_dir, ".yaml"),
+            (BUNDLED_TEMPLATE_DIR, "_template.yaml"), (BUNDLED_PRESET_DIR, ".yaml")
+        )
+        for directory, suffix in directories:
+            directory = os.path.abspath(directory)
+            if path.startswith(directory + os.sep) and path.endswith(suffix):
+                reference = os.path.relpath(path, directory)[:-len(suffix)].replace(os.sep, "/")
+                try:
+                    if resolve_template_reference(reference, self.template_dir, self.preset_dir) == path:
+                        return reference
+                except FileNotFoundError:
+                    pass
+        return path
+    
     def create_custom_preset(self, base_template, name, overrides, description=None):
-        """Create a new preset based on a template with overrides"""
-        # Load the base template
-        template_data = self.load_template(base_template)
-        if not template_data:
-            return None
+        """Create a new preset that extends a template with overrides
         
-        # Apply overrides
-        custom_data = self.customize_template(template_data, overrides)
+        Only the overrides are stored; the base template is merged in when the
+        preset is loaded, so later edits to the base carry through.
+        """
+        # Resolve the base template, making sure it loads
+        try:
+            base_path = resolve_template_reference(base_template, self.template_dir, self.preset_dir)
+        except FileNotFoundError as e:
+            print(f"Error loading template {base_template}: {e}")
+            return None
+        if not self.load_template(base_path):
+            return None
         
-        # Save as a preset
-        return self.save_preset(name, custom_data, description)
+        # Save the delta as a preset
+        preset_data = {EXTENDS_KEY: self.template_reference(base_path)}
+        preset_data.update(overrides or {})
+        return self.save_preset(name, preset_data, description)
 
 # Preset templates for common use cases
 PRESET_TEMPLATES = {
@@ -350,6 +671,12 @@ def merge_metrics_files(base_file, source_file, output_file=None, validate_colum
     manager = TemplateManager()
     return manager.merge_measures(base_file, source_file, output_file, validate_columns)
 
+def merge_many_metrics_files(base_file, source_files, output_file=None, validate_columns=True):
+    """Merge measures from several source files into base_file.
+    A convenience function that uses TemplateManager internally."""
+    manager = TemplateManager()
+    return manager.merge_measures_many(base_file, source_files, output_file, validate_columns)
+
 if __name__ == "__main__":
     # Initialize preset templates
     initialize_presets()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for the lookup indexes kept by metrics_view.MetricsView
+"""
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from metrics_view import MetricsView
+
+def make_view():
+    return MetricsView.from_dict({
+        "dimensions": [{"name": "site", "column": "site_domain"}],
+        "measures": [{"name": "imps", "expression": "SUM(impressions)"}]
+    })
+
+def test_upsert_measure_moves_expression_index():
+    view = make_view()
+    # Build the expression index before the upsert
+    assert view.find_measure_by_expression("sum( impressions )").name == "imps"
+
+    view.upsert_measure({"name": "imps", "expression": "SUM(clicks)"})
+
+    assert view.find_measure_by_expression("SUM(impressions)") is None
+    assert view.find_measure_by_expression("SUM(clicks)").name == "imps"
+    assert view.add_measure({"name": "impressions", "expression": "SUM(impressions)"})
+    assert not view.add_measure({"name": "clicks", "expression": "SUM(clicks)"})
+
+def test_upsert_measure_before_expression_index_is_built():
+    view = make_view()
+    view.upsert_measure({"name": "imps", "expression": "SUM(clicks)"})
+
+    assert view.find_measure_by_expression("SUM(impressions)") is None
+    assert view.find_measure_by_expression("SUM(clicks)").name == "imps"
+
+def test_upsert_measure_keeps_expression_shared_by_another_measure():
+    view = MetricsView.from_dict({"measures": [
+        {"name": "imps", "expression": "SUM(impressions)"},
+        {"name": "impressions", "expression": "SUM(impressions)"}
+    ]})
+    assert view.find_measure_by_expression("SUM(impressions)").name == "imps"
+
+    view.upsert_measure({"name": "imps", "expression": "SUM(clicks)"})
+
+    assert view.find_measure_by_expression("SUM(impressions)").name == "impressions"
+
+def test_upsert_dimension_moves_column_index():
+    view = make_view()
+    view.upsert_dimension({"name": "site", "column": "site_name"})
+
+    assert view.find_dimension_by_column("site_domain") is None
+    assert view.find_dimension_by_column("site_name").name == "site"
+    assert view.add_dimension({"name": "domain", "column": "site_domain"})
+    assert not view.add_dimension({"name": "site_label", "column": "site_name"})
+
+def test_upsert_dimension_keeps_column_shared_by_another_dimension():
+    view = MetricsView.from_dict({"dimensions": [
+        {"name": "site", "column": "site_domain"},
+        {"name": "domain", "column": "site_domain"}
+    ]})
+    view.upsert_dimension({"name": "site", "column": "site_name"})
+
+    assert view.find_dimension_by_column("site_domain").name == "domain"
@@ -1,9 +1,16 @@
 #!/usr/bin/env python3
 import os
+import glob
 import json
-import yaml
-import jsonschema
-from jsonschema import validate
+import time
+import hashlib
+import math
+import yaml_io
+from itertools import islice
+from metrics_view import MetricsView
+
+# Cap on the number of schema errors reported for a single file
+DEFAULT_MAX_ERRORS = 100
 
 def load_schema(schema_path=None):
     """Load the JSON schema for validation"""
@@ -22,36 +29,107 @@ def load_schema(schema_path=None):
         print(f"Error loading schema: {e}")
         return None
 
-def validate_yaml(data, schema=None):
-    """Validate a YAML structure against the schema"""
-    if schema is None:
-        schema = load_schema()
-        if schema is None:
-            return False, ["Unable to load schema for validation"]
+# Compiled validators keyed by schema fingerprint; None is the bundled schema
+_validator_cache = {}
+VALIDATOR_CACHE_SIZE = 8
+
+def schema_fingerprint(schema):
+    """Stable key for a schema's content, whatever object holds it"""
+    canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def get_validator(schema=None):
+    """Return a compiled Draft7Validator, building it once per process
+    
+    The meta-schema check and validator construction happen on first use
+    only; later calls with the same schema (or the default) reuse it, even
+    when the schema was loaded again into a new object. Only the
+    VALIDATOR_CACHE_SIZE most recently used schemas are kept.
+    """
+    # Imported here so that importing this module stays cheap
+    from jsonschema import Draft7Validator
+    
+    key = None if schema is None else schema_fingerprint(schema)
+    validator = _validator_cache.pop(key, None)
+    if validator is not None:
+        # Re-insert as most recently used
+        _validator_cache[key] = validator
+        return validator
+    
+    schema_data = load_schema() if schema is None else schema
+    if schema_data is None:
+        return None
     
+    Draft7Validator.check_schema(schema_data)
+    validator = Draft7Validator(schema_data)
+    
+    _validator_cache[key] = validator
+    while len(_validator_cache) > VALIDATOR_CACHE_SIZE:
+        del _validator_cache[next(iter(_validator_cache))]
+    return validator
+
+def format_error_path(path):
+    """Render a jsonschema error path as e.g. measures[17].format_preset"""
+    rendered = ""
+    for part in path:
+        if isinstance(part, int):
+            rendered += f"[{part}]"
+        else:
+            rendered += f".{part}" if rendered else str(part)
+    return rendered or "(root)"
+
+def validate_yaml(data, schema=None, max_errors=DEFAULT_MAX_ERRORS):
+    """Validate a YAML structure against the schema
+    
+    Every violation is collected in a single pass, up to max_errors
+    (None or 0 for no limit).
+    """
     try:
-        validate(instance=data, schema=schema)
-        return True, []
-    except jsonschema.exceptions.ValidationError as e:
-        return False, [f"Validation error: {e.message}"]
+        validator = get_validator(schema)
+        if validator is None:
+            return False, ["Unable to load schema for validation"]
+        
+        errors = validator.iter_errors(data)
+        if max_errors:
+            # One extra error tells us whether the cap was hit
+            errors = islice(errors, max_errors + 1)
+        errors = list(errors)
+        
+        truncated = bool(max_errors) and len(errors) > max_errors
+        if truncated:
+            errors = errors[:max_errors]
+        
+        messages = [
+            f"Validation error at {format_error_path(error.absolute_path)}: {error.message}"
+            for error in sorted(errors, key=lambda error: [(isinstance(part, str), part) for part in error.absolute_path])
+        ]
+        if truncated:
+            messages.append(f"Stopped after {max_errors} errors")
+        
+        return not messages, messages
     except Exception as e:
         return False, [f"Unexpected error during validation: {str(e)}"]
 
-def validate_yaml_file(file_path, schema=None):
+def load_view_file(file_path):
+    """Load a metrics YAML file, resolving `extends:` for templates and presets
+    
+    A template or preset that extends another only holds its differences,
+    so it is validated as the full view it compiles to.
+    """
+    data = yaml_io.load_file(file_path)
+    if isinstance(data, dict) and "extends" in data:
+        # Imported here so that importing this module stays cheap
+        from template_manager import shared_template_cache
+        data = shared_template_cache().load(file_path)
+    return data
+
+def validate_yaml_file(file_path, schema=None, max_errors=DEFAULT_MAX_ERRORS):
     """Validate a YAML file against the schema"""
     try:
-        with open(file_path, 'r') as file:
-            # Skip comments
-            yaml_content = ""
-            for line in file:
-                if not line.strip().startswith('#'):
-                    yaml_content += line
-            
-            # Parse YAML content
-            data = yaml.safe_load(yaml_content)
-            
-            # Validate against schema
-            return validate_yaml(data, schema)
+        data = load_view_file(file_path)
+        
+        # Validate against schema
+        return validate_yaml(data, schema, max_errors)
     except Exception as e:
         return False, [f"Error loading YAML file: {str(e)}"]
 
@@ -59,34 +137,25 @@ def validate_essential_fields(data):
     """Perform additional validation beyond schema checking"""
     errors = []
     
-    # Check dimensions have unique names/identifiers
-    dimension_names = set()
-    for dimension in data.get("dimensions", []):
-        name = dimension.get("name") or dimension.get("label")
-        if name in dimension_names:
-            errors.append(f"Duplicate dimension name: {name}")
-        dimension_names.add(name)
-    
-    # Check measures have unique names
-    measure_names = set()
-    for measure in data.get("measures", []):
-        name = measure.get("name")
-        if name in measure_names:
-            errors.append(f"Duplicate measure name: {name}")
-        measure_names.add(name)
+    # Duplicate names/identifiers are found while the view is indexed
+    view = MetricsView.from_dict(data)
+    for name in view.duplicate_dimension_names:
+        errors.append(f"Duplicate dimension name: {name}")
+    for name in view.duplicate_measure_names:
+        errors.append(f"Duplicate measure name: {name}")
     
     # Check expressions for common issues
-    for measure in data.get("measures", []):
-        expr = measure.get("expression", "")
+    for measure in view.measures:
+        expr = measure.expression or ""
         if expr.count('(') != expr.count(')'):
-            errors.append(f"Mismatched parentheses in expression for {measure.get('name')}")
+            errors.append(f"Mismatched parentheses in expression for {measure.name}")
     
     return len(errors) == 0, errors
 
-def comprehensive_validation(data):
+def comprehensive_validation(data, schema=None, max_errors=DEFAULT_MAX_ERRORS):
     """Perform both schema validation and additional field validation"""
     # First validate the schema
-    schema_valid, schema_errors = validate_yaml(data)
+    schema_valid, schema_errors = validate_yaml(data, schema, max_errors)
     
     # If schema is valid, perform additional validations
     if schema_valid:
@@ -95,24 +164,98 @@ def comprehensive_validation(data):
     
     return schema_valid, schema_errors
 
-def comprehensive_file_validation(file_path):
+def comprehensive_file_validation(file_path, schema=None, max_errors=DEFAULT_MAX_ERRORS):
     """Perform comprehensive validation on a file"""
     try:
-        with open(file_path, 'r') as file:
-            # Skip comments
-            yaml_content = ""
-            for line in file:
-                if not line.strip().startswith('#'):
-                    yaml_content += line
-            
-            # Parse YAML content
-            data = yaml.safe_load(yaml_content)
-            
-            # Perform comprehensive validation
-            return comprehensive_validation(data)
+        data = load_view_file(file_path)
+        
+        # Perform comprehensive validation
+        return comprehensive_validation(data, schema, max_errors)
     except Exception as e:
         return False, [f"Error loading YAML file: {str(e)}"]
 
+def find_yaml_files(directory, pattern="*.yaml", recursive=True):
+    """List files under directory matching a glob pattern, sorted by path"""
+    if recursive:
+        paths = glob.glob(os.path.join(directory, "**", pattern), recursive=True)
+    else:
+        paths = glob.glob(os.path.join(directory, pattern))
+    return sorted(path for path in paths if os.path.isfile(path))
+
+def _init_validation_worker():
+    """Compile the validator once when a worker process starts"""
+    get_validator()
+
+def _validate_file_chunk(file_paths, max_errors):
+    """Validate a chunk of files in a worker process"""
+    results = []
+    for file_path in file_paths:
+        start = time.perf_counter()
+        is_valid, errors = comprehensive_file_validation(file_path, max_errors=max_errors)
+        results.append({
+            "file": file_path,
+            "valid": is_valid,
+            "errors": errors,
+            "seconds": time.perf_counter() - start
+        })
+    return results
+
+def validate_files(file_paths, jobs=None, max_errors=DEFAULT_MAX_ERRORS, chunk_size=None):
+    """Validate many files on a process pool
+    
+    Files are sent to workers in chunks so that per-task overhead stays small,
+    and each worker compiles the schema validator once. By default the chunk
+    size gives every worker about four chunks, so small directories still
+    use all the workers and uneven files balance out.
+    
+    Yields:
+        One result dict (file, valid, errors, seconds) per file, as chunks complete
+    """
+    if not chunk_size:
+        workers = jobs or os.cpu_count() or 1
+        chunk_size = max(1, math.ceil(len(file_paths) / (workers * 4)))
+    chunks = [file_paths[i:i + chunk_size] for i in range(0, len(file_paths), chunk_size)]
+    
+    if jobs == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield from _validate_file_chunk(chunk, max_errors)
+        return
+    
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_validation_worker) as executor:
+        futures = [executor.submit(_validate_file_chunk, chunk, max_errors) for chunk in chunks]
+        for future in as_completed(futures):
+            yield from future.result()
+
+def write_junit_report(results, stream, suite_name="metrics-yaml-validation"):
+    """Write validation results as a JUnit XML test suite"""
+    from xml.etree import ElementTree
+    
+    failures = sum(1 for result in results if not result["valid"])
+    suite = ElementTree.Element("testsuite", {
+        "name": suite_name,
+        "tests": str(len(results)),
+        "failures": str(failures),
+        "errors": "0",
+        "time": f"{sum(result['seconds'] for result in results):.3f}"
+    })
+    
+    for result in sorted(results, key=lambda result: result["file"]):
+        case = ElementTree.SubElement(suite, "testcase", {
+            "classname": os.path.dirname(result["file"]) or ".",
+            "name": os.path.basename(result["file"]),
+            "time": f"{result['seconds']:.3f}"
+        })
+        if not result["valid"]:
+            failure = ElementTree.SubElement(case, "failure", {
+                "message": result["errors"][0] if result["errors"] else "Validation failed"
+            })
+            failure.text = "\n".join(result["errors"])
+    
+    ElementTree.ElementTree(suite).write(stream, encoding="unicode", xml_declaration=True)
+    stream.write("\n")
+
 if __name__ == "__main__":
     import sys
     if len(sys.argv) > 1:
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Atomic, deterministic writer for metrics view files
+
+The view is emitted piece by piece: the header, each top-level key, then
+every dimension and measure one at a time, so sections given as generators
+are never collected and the file is never rendered into a single string.
+Keys are written in a fixed order (see TOP_LEVEL_ORDER, DIMENSION_ORDER and
+MEASURE_ORDER; unknown keys follow), so the same view always produces the
+same bytes.
+
+Output goes to a temporary file next to the target, which replaces the
+target with os.replace only once it is complete, so a crash mid-write never
+leaves a truncated file behind.
+
+The header records a hash of the view's data ("# Content hash: ..."),
+independent of key order and computed as the entries are written. When the
+file on disk records the same hash and its body still hashes to it, the
+temporary file is discarded and the target is left untouched, whatever the
+rest of the header (timestamps, source notes) says.
+"""
+import os
+import re
+import json
+import shutil
+import hashlib
+import tempfile
+
+import yaml_io
+from metrics_view import MetricsView
+
+TOP_LEVEL_ORDER = (
+    "extends", "version", "type", "title", "display_name", "description",
+    "model", "database", "database_schema", "timeseries", "smallest_time_grain",
+    "first_day_of_week", "first_month_of_year", "default_time_range",
+    "available_time_zones", "available_time_ranges"
+)
+# Written last, one entry at a time
+SECTIONS = ("dimensions", "measures")
+
+CONTENT_HASH_FIELD = "content_hash"
+CONTENT_HASH_LINE = re.compile(r"^# Content hash: \S*$", re.MULTILINE)
+
+# Written in the header in place of the content hash until the body is done
+HASH_PLACEHOLDER = "0" * 64
+
+# Mode given to new files, read on first use (see _new_file_mode)
+_new_mode = None
+
+# Files written and skipped by this process
+_counts = {"written": 0, "unchanged": 0}
+
+DIMENSION_ORDER = ("name", "display_name", "label", "column", "expression", "description")
+MEASURE_ORDER = (
+    "name", "label", "display_name", "expression", "description",
+    "format_preset", "format_d3", "valid_percent_of_total"
+)
+
+def ordered(mapping, order):
+    """Copy of mapping with the keys in `order` first, then the rest as they were"""
+    result = {key: mapping[key] for key in order if key in mapping}
+    for key, value in mapping.items():
+        if key not in result:
+            result[key] = value
+    return result
+
+def _view_parts(view):
+    """(top-level mapping, {section: items}) of a view dict or MetricsView"""
+    if isinstance(view, MetricsView):
+        return view.data, {
+            "dimensions": (dimension.to_dict() for dimension in view.dimensions),
+            "measures": (measure.to_dict() for measure in view.measures)
+        }
+    return view, {key: view[key] for key in SECTIONS if key in view}
+
+def _is_entry_list(items):
+    """Whether a section value is written (and hashed) one entry at a time"""
+    return not (items is None or isinstance(items, (str, dict)))
+
+def _canonical(value):
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+def _hash_text(digest, text):
+    digest.update(text.encode("utf-8"))
+
+def _iter_view_pieces(view, digest):
+    """Yield what iter_view_chunks writes, updating digest with the view's data
+
+    Pieces are either literal text or a value to render with yaml_io.dump.
+    The digest sees the same data in the same order whether or not the
+    pieces are rendered, which is what keeps recorded hashes checkable.
+    """
+    top_level, sections = _view_parts(view)
+
+    fields = {key: value for key, value in top_level.items() if key not in SECTIONS}
+    _hash_text(digest, _canonical(fields))
+    for key, value in ordered(fields, TOP_LEVEL_ORDER).items():
+        yield {key: value}
+
+    for key, order in zip(SECTIONS, (DIMENSION_ORDER, MEASURE_ORDER)):
+        if key not in sections:
+            continue
+        items = sections[key]
+        if not _is_entry_list(items):
+            _hash_text(digest, f"\n{key}={_canonical(items)}")
+            yield {key: items}
+            continue
+        _hash_text(digest, f"\n{key}:")
+        first = True
+        for item in items:
+            if first:
+                yield f"{key}:\n"
+                first = False
+            _hash_text(digest, "\n" + _canonical(item))
+            yield [ordered(item, order) if isinstance(item, dict) else item]
+        if first:
+            yield f"{key}: []\n"
+
+def iter_view_chunks(view, header="", digest=None):
+    """Yield the text of a metrics view file in pieces
+
+    Args:
+        view: Metrics view dict or MetricsView. Its dimensions and measures
+            may be any iterables, including generators.
+        header: Comment header written before the body
+        digest: Optional hashlib.sha256() object; once every chunk has been
+            taken it holds content_hash(view)
+    """
+    if header:
+        yield header
+    for piece in _iter_view_pieces(view, digest if digest is not None else hashlib.sha256()):
+        yield piece if isinstance(piece, str) else yaml_io.dump(piece)
+
+def content_hash(data):
+    """SHA-256 of a view's data, independent of key order and formatting"""
+    digest = hashlib.sha256()
+    for _ in _iter_view_pieces(data, digest):
+        pass
+    return digest.hexdigest()
+
+def recorded_hash(path):
+    """Content hash recorded in a file's header, or None"""
+    try:
+        return yaml_io.parse_header(yaml_io.read_header(path)).get(CONTENT_HASH_FIELD)
+    except (OSError, UnicodeDecodeError):
+        return None
+
+def is_up_to_date(path, digest):
+    """True if path records digest and its parsed body still hashes to it
+
+    The recorded hash alone is cheap to read but says nothing about edits
+    made to the body afterwards, so it is only trusted once the body agrees.
+    """
+    if recorded_hash(path) != digest:
+        return False
+    try:
+        return content_hash(yaml_io.load_file(path)) == digest
+    except (OSError, UnicodeDecodeError, yaml_io.YAMLError):
+        return False
+
+def stamp_header(header, digest):
+    """Add the content hash line at the end of a comment header"""
+    comments = header.rstrip("\n")
+    line = f"# Content hash: {digest}"
+    return f"{comments}\n{line}\n\n" if comments else f"{line}\n\n"
+
+def restamp_text(text, data):
+    """Update the content hash line of an already rendered file, if it has one
+
+    Used for edits that keep a file's own text (comments included), so its
+    recorded hash still matches its data afterwards.
+    """
+    match = yaml_io.FIRST_CONTENT_LINE.search(text)
+    end = match.start() if match else len(text)
+    header = CONTENT_HASH_LINE.sub(f"# Content hash: {content_hash(data)}", text[:end], count=1)
+    return header + text[end:]
+
+def write_counts():
+    """Number of files written and left unchanged so far in this process"""
+    return dict(_counts)
+
+def file_digest(path):
+    """SHA-256 of a file's bytes, or None if it can't be read"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(65536), b""):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+def _new_file_mode():
+    """Mode open() gives a new file under the process umask
+
+    os.umask can only be read by setting it, so this is done once, on the
+    first new file rather than at import.
+    """
+    global _new_mode
+    if _new_mode is None:
+        umask = os.umask(0o022)
+        os.umask(umask)
+        _new_mode = 0o666 & ~umask
+    return _new_mode
+
+def write_chunks(path, chunks, finish=None):
+    """Stream text chunks to path atomically, skipping identical content
+
+    Args:
+        finish: Optional callable run with the temporary file's path once
+            every chunk is written. It returns False when the target is
+            already up to date, and replaces the byte comparison.
+
+    Returns:
+        True if the file was written, False if it was left unchanged
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    digest = hashlib.sha256()
+
+    # A unique name per call, so concurrent writers (threads included) never
+    # share a temporary file
+    file = tempfile.NamedTemporaryFile(
+        mode='w', encoding="utf-8", dir=directory,
+        prefix=f".{os.path.basename(path)}.", suffix=".tmp", delete=False
+    )
+    tmp_path = file.name
+    try:
+        with file:
+            for chunk in chunks:
+                file.write(chunk)
+                if finish is None:
+                    digest.update(chunk.encode("utf-8"))
+
+        if finish is not None:
+            changed = finish(tmp_path)
+        else:
+            changed = digest.hexdigest() != file_digest(path)
+        if not changed:
+            os.remove(tmp_path)
+            _counts["unchanged"] += 1
+            return False
+
+        # NamedTemporaryFile creates the file 0600; keep the target's mode,
+        # or give a new file the mode open() would have
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        else:
+            os.chmod(tmp_path, _new_file_mode())
+        os.replace(tmp_path, path)
+        _counts["written"] += 1
+        return True
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_view(path, view, header=""):
+    """Write a metrics view file atomically (see iter_view_chunks)
+
+    Entries are hashed as they are written. The header carries a placeholder
+    that is overwritten with the content hash once the body is complete, and
+    the file is left alone if it already records that hash and its body
+    matches it.
+
+    Returns:
+        True if the file was written, False if it was already up to date
+    """
+    header = stamp_header(header, HASH_PLACEHOLDER)
+    # Byte offset of the placeholder, which is always the last one in the header
+    offset = len(header[:header.rindex(HASH_PLACEHOLDER)].encode("utf-8"))
+    digest = hashlib.sha256()
+
+    def finish(tmp_path):
+        value = digest.hexdigest()
+        if is_up_to_date(path, value):
+            return False
+        with open(tmp_path, 'r+b') as file:
+            file.seek(offset)
+            file.write(value.encode("ascii"))
+        return True
+
+    return write_chunks(path, iter_view_chunks(view, header, digest), finish)
+
+def write_text(path, text):
+    """Write already-rendered text atomically, skipping identical content"""
+    return write_chunks(path, [text])
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Central YAML loading and dumping
+
+Uses PyYAML's libyaml bindings (CSafeLoader/CSafeDumper) when PyYAML was
+built with them and falls back to the pure-Python SafeLoader/SafeDumper
+otherwise. Both paths produce the same data and the same emitted text for
+metrics views, so callers never need to know which one is active.
+"""
+import re
+import yaml
+
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+    HAS_LIBYAML = True
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+    HAS_LIBYAML = False
+
+# Error raised for malformed YAML, whichever implementation is active
+YAMLError = yaml.YAMLError
+
+def safe_load(stream, loader=None):
+    """Parse a YAML string or stream"""
+    return yaml.load(stream, Loader=loader or SafeLoader)
+
+def dump(data, stream=None, dumper=None):
+    """Emit data as block-style YAML, keeping key order"""
+    return yaml.dump(
+        data, stream,
+        Dumper=dumper or SafeDumper,
+        sort_keys=False,
+        default_flow_style=False
+    )
+
+# Header fields look like "Based on template: x.yaml" or "Generated on 2025-01-01 10:00:00"
+HEADER_COLON_FIELD = re.compile(r"^([A-Za-z][A-Za-z ]*?): (.+)$")
+HEADER_ON_FIELD = re.compile(r"^([A-Za-z][A-Za-z ]*?) on (.+)$")
+
+# First line that is neither blank nor a comment
+FIRST_CONTENT_LINE = re.compile(r"^[ \t]*[^#\s]", re.MULTILINE)
+
+def load_file(file_path):
+    """Load a YAML file, handing the stream straight to the parser
+    
+    Comments need no pre-processing since the parser already ignores them.
+    """
+    with open(file_path, 'r') as file:
+        return safe_load(file)
+
+def _leading_comments(lines):
+    """Collect comment lines up to the first line of YAML content"""
+    header_lines = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            break
+        if line:
+            header_lines.append(line)
+    return header_lines
+
+def load_file_with_header(file_path):
+    """Load a YAML file along with its leading comment header
+    
+    Returns:
+        Tuple of (data, header_lines)
+    """
+    with open(file_path, 'r') as file:
+        content = file.read()
+    
+    # Only the header is split into lines; the parser gets the whole text
+    match = FIRST_CONTENT_LINE.search(content)
+    header_text = content[:match.start()] if match else content
+    return safe_load(content), _leading_comments(header_text.splitlines())
+
+# "measures:" or "measures: []" at column 0, with an optional trailing comment
+TOP_LEVEL_KEY = re.compile(r"""^(["']?)([A-Za-z_][\w-]*)\1[ \t]*:[ \t]*(.*?)[ \t]*(?:#.*)?$""")
+
+def append_sequence_items(text, key, items):
+    """Append items to a top-level block sequence, leaving the rest of the text as is
+    
+    The new items are emitted after the last existing item of `key` with the
+    same indentation, so comments, ordering and formatting elsewhere in the
+    file are untouched. A missing key is added at the end of the file.
+    
+    Returns:
+        The new text, or None if the key's value is not a block sequence
+        (e.g. flow style) and the caller has to re-emit the document
+    """
+    if not items:
+        return text
+    
+    lines = text.splitlines(keepends=True)
+    start = None
+    for i, line in enumerate(lines):
+        match = TOP_LEVEL_KEY.match(line.rstrip("\r\n"))
+        if match and match.group(2) == key:
+            start, value = i, match.group(3)
+            break
+    
+    if start is None:
+        separator = "\n" if text and not text.endswith("\n") else ""
+        return text + separator + f"{key}:\n" + dump(items)
+    
+    if value in ("[]", "~", "null"):
+        lines[start] = f"{key}:\n"
+    elif value:
+        return None
+    
+    # The block ends at the next line of content at column 0 that is not an item;
+    # comments and blank lines after the last item stay where they are
+    last_item_line = start
+    indent = None
+    for i in range(start + 1, len(lines)):
+        stripped = lines[i].strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if not lines[i][0].isspace() and not lines[i].startswith("-"):
+            break
+        if indent is None and stripped.startswith("-"):
+            indent = lines[i][:len(lines[i]) - len(lines[i].lstrip())]
+        last_item_line = i
+    
+    if not lines[last_item_line].endswith("\n"):
+        lines[last_item_line] += "\n"
+    
+    indent = indent or ""
+    rendered = "".join(indent + line for line in dump(items).splitlines(keepends=True))
+    lines.insert(last_item_line + 1, rendered)
+    return "".join(lines)
+
+def read_header(file_path):
+    """Read only the leading comment lines of a file"""
+    with open(file_path, 'r') as file:
+        return _leading_comments(file)
+
+def _header_field(text):
+    """Split "Label: value" or "Label on value" into (label_key, value)"""
+    match = HEADER_COLON_FIELD.match(text)
+    if match:
+        return match.group(1).strip().lower().replace(" ", "_"), match.group(2).strip()
+    
+    match = HEADER_ON_FIELD.match(text)
+    if match:
+        return match.group(1).strip().lower().replace(" ", "_") + "_on", match.group(2).strip()
+    
+    return None
+
+def parse_header(header_lines):
+    """Extract provenance fields from comment header lines
+    
+    Returns:
+        Dict such as {"title": "Metrics view YAML", "generated_on": "2025-04-19 13:38:11",
+        "based_on_template": "display_template.yaml"}
+    """
+    metadata = {}
+    for line in header_lines:
+        text = line.lstrip("#").strip()
+        if not text:
+            continue
+        
+        # One line can carry several fields: "DSP: TTD, Media Type: DISPLAY"
+        fields = [_header_field(segment) for segment in text.split(", ")]
+        if not all(fields):
+            fields = [_header_field(text)]
+        
+        if fields[0] is None:
+            metadata.setdefault("title", text)
+            continue
+        
+        for label, value in fields:
+            metadata.setdefault(label, value)
+    
+    return metadata